@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures the memory allocated, and time taken, by each physics step of the
+bouncing balls, and how the step time grows with the number of balls when
+testing every pair, and when testing only the neighbours found with the
+grid.
+
+On MicroPython this reports the growth of gc.mem_alloc() across the steps,
+with the collector turned off. CPython has no gc.mem_alloc, so there it
+reports the most memory that tracemalloc saw in use during a step, beyond
+what was in use before it.
+
+    PYTHONPATH=.:emulated python3 benchmarks/balls.py
+"""
+
+import gc
+import random
+import time
+
+from smartdisplay.balls import BUSY_SIZE, Balls, FixedBalls, MAX_SIZE
+
+STEPS = 1000
+STEP_TIME = 100
+
+COUNTS = (5, 20, 50, 100, 200, 500)
+
+
+def make_balls(count: int,
+               max_size: int = MAX_SIZE,
+               engine=Balls) -> Balls:
+    random.seed(1)
+    balls = engine(count, max_size)
+    for _ in range(count):
+        balls.add(random.random() * 54 + 5,
+                  random.random() * 54 + 5,
+                  random.randint(1, max_size),
+                  random.random() * 8,
+                  random.random() * 8,
+                  None)
+    return balls
+
+
+def step(balls: Balls) -> None:
+    balls.update(STEP_TIME)
+    balls.collide_all()
+
+
+def step_pairs(balls: Balls) -> None:
+    balls.update(STEP_TIME)
+    balls.collide_pairs()
+
+
+def step_grid(balls: Balls) -> None:
+    balls.update(STEP_TIME)
+    balls.collide_grid()
+
+
+def allocated(balls: Balls) -> str:
+    # Run a few steps first, so anything created once is out of the way.
+    for _ in range(10):
+        step(balls)
+
+    if hasattr(gc, "mem_alloc"):
+        gc.collect()
+        gc.disable()
+        before = gc.mem_alloc()
+        for _ in range(STEPS):
+            step(balls)
+        used = gc.mem_alloc() - before
+        gc.enable()
+        return f"{used / STEPS:.1f} bytes allocated a step"
+
+    import tracemalloc
+    tracemalloc.start()
+    peak = 0
+    for _ in range(STEPS):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        step(balls)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return f"at most {peak} bytes in use during a step"
+
+
+def timed(fn, balls: Balls, steps: int = STEPS) -> float:
+    start = time.ticks_ms() if hasattr(time, "ticks_ms") else None
+    if start is None:
+        begin = time.perf_counter()
+        for _ in range(steps):
+            fn(balls)
+        return (time.perf_counter() - begin) * 1000 / steps
+    for _ in range(steps):
+        fn(balls)
+    return time.ticks_diff(time.ticks_ms(), start) / steps
+
+
+def main() -> None:
+    for engine in (Balls, FixedBalls):
+        balls = make_balls(5, engine=engine)
+        print(f"{balls.count} {engine.__name__}, {STEPS} steps")
+        print(f"  {allocated(balls)}")
+        print(f"  {timed(step, balls):.3f}ms a step")
+
+    print(f"Step time, with balls of radius 1 to {BUSY_SIZE}")
+    print("  balls  every pair      grid")
+    for count in COUNTS:
+        steps = max(10, STEPS // count)
+        pairs = timed(step_pairs, make_balls(count, BUSY_SIZE), steps)
+        grid = timed(step_grid, make_balls(count, BUSY_SIZE), steps)
+        print(f"  {count:5} {pairs:9.3f}ms {grid:7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
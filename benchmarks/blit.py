@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares drawing a 64x64 RGB888 image one Colour object per pixel, as the
+Sonos and Advent screens used to, with utils.blit.
+
+Run from the top of the repository on the emulator:
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/blit.py
+"""
+
+import time
+
+import picographics
+from i75 import Colour, I75
+
+from smartdisplay.utils import blit
+
+ROUNDS = 20
+
+
+def colour_loop(i75, image, start_x, end_x):
+    for y in range(64):
+        for x in range(start_x, end_x):
+            Colour.fromrgb(image[(y * 64 + x) * 3],
+                           image[(y * 64 + x) * 3 + 1],
+                           image[(y * 64 + x) * 3 + 2]).set_colour(i75)
+            i75.display.pixel(x, y)
+
+
+def blit_loop(i75, image, start_x, end_x):
+    blit(i75, image, start_x=start_x, end_x=end_x)
+
+
+def album_art():
+    """An image with flat areas and gradients, like most album art."""
+    image = bytearray(64 * 64 * 3)
+    for y in range(64):
+        for x in range(64):
+            i = (y * 64 + x) * 3
+            if x < 32:
+                image[i:i + 3] = bytes((200, 30, 30))
+            else:
+                image[i:i + 3] = bytes((x * 4, y * 4, (x * y) % 256))
+    return image
+
+
+def timed(i75, fn, image, start_x, end_x):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(i75, image, start_x, end_x)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def snapshot(i75):
+    return [list(row) for row in i75.display._driver._buffer]
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    image = album_art()
+
+    for name, start_x, end_x in [("Full image", 0, 64),
+                                 ("Advent wipe step", 27, 32)]:
+        i75.display.set_pen(i75.display.create_pen(0, 0, 0))
+        i75.display.clear()
+        colour_loop(i75, image, start_x, end_x)
+        expected = snapshot(i75)
+        i75.display.set_pen(i75.display.create_pen(0, 0, 0))
+        i75.display.clear()
+        blit_loop(i75, image, start_x, end_x)
+        assert snapshot(i75) == expected
+
+        print(name)
+        print(f"  Colour per pixel: "
+              f"{timed(i75, colour_loop, image, start_x, end_x):7.2f}ms")
+        print(f"              blit: "
+              f"{timed(i75, blit_loop, image, start_x, end_x):7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
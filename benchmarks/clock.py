@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares a minute of clock frames drawn by erasing the hands in black and
+drawing the whole face again, as before, with restoring the pixels under
+the hands from the face layer.
+
+Run from the top of the repository on the emulator:
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/clock.py
+"""
+
+import math
+import time
+
+import picographics
+from i75 import DateTime, I75
+
+from smartdisplay.clock import Clock, FACE
+from smartdisplay.damage import DamageTracker
+
+FRAMES = 60 * 20
+
+
+def times():
+    """The time at each 50ms frame through a minute."""
+    for frame in range(FRAMES):
+        ms = frame * 50
+        yield DateTime(2024, 1, 1, 0, 10, 9, ms // 1000), ms % 1000
+
+
+def float_hand(i75, length, percent):
+    angle = 2 * math.pi * percent
+    cx, cy = (32, 31) if angle < math.pi / 2 else \
+        (32, 32) if angle < math.pi else (31, 31)
+    i75.display.line(cx, cy,
+                     math.floor(length * math.sin(angle) + cx),
+                     math.floor(length * -math.cos(angle) + cy))
+
+
+def float_clock(i75, white, red, now, subsecond, face=True):
+    if face:
+        i75.display.set_pen(white)
+        for tick in range(12):
+            angle = 2 * math.pi * tick / 12.0
+            cx, cy = (32, 31) if angle < math.pi / 2 else \
+                (32, 32) if angle < math.pi else (31, 31)
+            i75.display.line(math.floor(28 * math.cos(angle) + cx),
+                             math.floor(28 * math.sin(angle) + cy),
+                             math.floor(31 * math.cos(angle) + cx),
+                             math.floor(31 * math.sin(angle) + cy))
+        i75.display.line(32, 3, 32, 0)
+        i75.display.line(31, 60, 31, 63)
+        i75.display.line(0, 31, 3, 31)
+        i75.display.line(60, 32, 63, 32)
+    i75.display.set_pen(red)
+    float_hand(i75, 30, (now.second + subsecond / 1000.0) / 60.0)
+    i75.display.set_pen(white)
+    seconds = now.minute * 60 + now.second + subsecond / 1000.0
+    float_hand(i75, 30, seconds / 3600.0)
+    float_hand(i75, 25, (seconds + (now.hour % 12) * 3600) / 43200.0)
+
+
+def redraw_face(i75, clock):
+    old = None
+    for now, subsecond in times():
+        if old is not None:
+            float_clock(i75, clock.black, clock.black, *old, face=False)
+        float_clock(i75, clock.white, clock.red, now, subsecond)
+        old = now, subsecond
+        i75.display.update()
+
+
+def face_layer(i75, clock):
+    for now, subsecond in times():
+        clock.render_hands(i75, now, subsecond)
+        i75.display.update()
+
+
+def timed(i75, fn):
+    i75.display.set_pen(i75.display.create_pen(0, 0, 0))
+    i75.display.clear()
+    i75.display.reset_stats()
+    clock = Clock(i75, None, bytearray())
+    start = time.perf_counter()
+    fn(i75, clock)
+    elapsed = (time.perf_counter() - start) * 1000 / FRAMES
+    return f"{elapsed:6.3f}ms a frame, {i75.display.stats()}"
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    i75.display = DamageTracker(i75.display)
+    count = sum(FACE.is_pixel_set(x, y) for x in range(64) for y in range(64))
+
+    print(f"A minute of frames, with {count} pixels in the face")
+    print(f"  redraw face: {timed(i75, redraw_face)}")
+    print(f"   face layer: {timed(i75, face_layer)}")
+
+
+if __name__ == "__main__":
+    main()
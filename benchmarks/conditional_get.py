@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Counts the bytes sent and JSON parses made when fetching the data screens
+repeatedly from a local stand-in for the backend, with and without ETags.
+
+Run from the top of the repository, with i75's emulated modules on the
+path:
+
+    PYTHONPATH=.:emulated python3 benchmarks/conditional_get.py
+"""
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from smartdisplay import backend as backend_module
+from smartdisplay.backend import Backend
+
+PORT = 6011
+
+SHOWINGS = 20
+
+# How many showings go by before the data changes.
+CHANGE_EVERY = 5
+
+DATA = {
+    "/house_temperature": {
+        "mainbedroom": 20.5, "alexbedroom": 19.8, "harrietbedroom": 21.1,
+        "kitchen": 22.4, "lounge": 21.9, "office": 23.0, "outside": 11.2,
+    },
+    "/water_gas": {
+        "water_day": 412.0, "water_week": 2731.0, "gas_day": 3.2,
+        "gas_week": 21.7, "water_last_week": 2810.0, "gas_last_week": 25.1,
+    },
+}
+
+
+class Counts:
+    def __init__(self) -> None:
+        self.bytes = 0
+        self.full = 0
+        self.not_modified = 0
+        self.parses = 0
+
+
+COUNTS = Counts()
+
+
+class CountingWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data):
+        COUNTS.bytes += len(data)
+        return self.stream.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class CountingJson:
+    def loads(self, data):
+        COUNTS.parses += 1
+        return json.loads(data)
+
+
+class StandIn(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    use_etags = True
+    version = 0
+
+    def setup(self):
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+
+    def do_GET(self):
+        data = dict(DATA[self.path], version=StandIn.version)
+        body = json.dumps(data).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+
+        if StandIn.use_etags and self.headers.get("If-None-Match") == etag:
+            COUNTS.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        COUNTS.full += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if StandIn.use_etags:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(use_etags: bool) -> None:
+    global COUNTS
+    COUNTS = Counts()
+    StandIn.use_etags = use_etags
+    StandIn.version = 0
+
+    backend = Backend("127.0.0.1", PORT)
+    redraws = 0
+    last = {}
+    for showing in range(SHOWINGS):
+        if showing > 0 and showing % CHANGE_EVERY == 0:
+            StandIn.version += 1
+        for path in DATA:
+            data = backend.get_json(path)
+            assert data["version"] == StandIn.version
+            # The display only needs redrawing if it's given new data.
+            if data is not last.get(path):
+                redraws += 1
+            last[path] = data
+    backend.close()
+
+    print(f"{'ETags' if use_etags else 'No ETags':>8}: "
+          f"{COUNTS.bytes:6d} bytes, "
+          f"{COUNTS.full:3d} full, "
+          f"{COUNTS.not_modified:3d} not modified, "
+          f"{COUNTS.parses:3d} parses, "
+          f"{redraws:3d} redraws")
+
+
+def main() -> None:
+    backend_module.json = CountingJson()  # type: ignore
+
+    server = ThreadingHTTPServer(("127.0.0.1", PORT), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"{SHOWINGS} showings of {len(DATA)} screens, "
+          f"data changing every {CHANGE_EVERY}")
+    run(False)
+    run(True)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares drawing a faded image behind the weather and Sonos text with a
+float multiply per channel, as before, and with a fade table.
+
+Run on the emulator from the top of the repository, once convert.sh has
+made the images:
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/fade.py
+"""
+
+import time
+
+import picographics
+from i75 import I75, Image
+
+from smartdisplay.utils import blit, fade_table, render_image_with_fade
+
+ROUNDS = 10
+
+
+def multiply_fade(i75, img, margin, fade):
+    for y in range(img.height):
+        for x in range(img.width):
+            if (y < margin or y >= (img.height - margin)) \
+               or (x < margin or x >= (img.width - margin)):
+                pfade = 1.0
+            else:
+                pfade = fade
+            i75.display.set_pen(i75.display.create_pen(
+                int(img.data[3 * (y * img.width + x)] * pfade),
+                int(img.data[3 * (y * img.width + x) + 1] * pfade),
+                int(img.data[3 * (y * img.width + x) + 2] * pfade),
+            ))
+            i75.display.pixel(x, y)
+
+
+def multiply_rows(i75, image, y1, y2):
+    for py in range(y1, y2):
+        for px in range(64):
+            i75.display.set_pen(i75.display.create_pen(
+                round(0.5 * image[(py * 64 + px) * 3]),
+                round(0.5 * image[(py * 64 + px) * 3 + 1]),
+                round(0.5 * image[(py * 64 + px) * 3 + 2])))
+            i75.display.pixel(px, py)
+
+
+def table_rows(i75, image, y1, y2):
+    blit(i75, image, start_y=y1, end_y=y2, table=fade_table(0.5))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def snapshot(i75):
+    return [list(row) for row in i75.display._driver._buffer]
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    img = Image.load_into_buffer(open("images/cloudy.i75", "rb"),
+                                 bytearray(64 * 64 * 3))
+
+    multiply_fade(i75, img, 2, 0.5)
+    expected = snapshot(i75)
+    render_image_with_fade(i75, img, 2, 0.5)
+    assert snapshot(i75) == expected
+
+    print("Weather background")
+    print(f"  multiply: {timed(multiply_fade, i75, img, 2, 0.5):7.2f}ms")
+    print(f"     table: "
+          f"{timed(render_image_with_fade, i75, img, 2, 0.5):7.2f}ms")
+    for fade in (0.25, 0.75):
+        print(f"     table: "
+              f"{timed(render_image_with_fade, i75, img, 2, fade):7.2f}ms"
+              f" at {fade}")
+
+    print("Sonos, behind 12 rows of text")
+    print(f"  multiply: {timed(multiply_rows, i75, img.data, 52, 64):7.2f}ms")
+    print(f"     table: {timed(table_rows, i75, img.data, 52, 64):7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
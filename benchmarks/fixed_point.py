@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Checks that the integer ball physics looks the same as the float physics,
+over a long run from the same starting balls.
+
+Both are compared with the same physics done in doubles. Any difference,
+even in rounding, moves a bounce off a wall by a step now and then, and
+balls that collide soon drift apart altogether, so the float version on
+the device doesn't follow the doubles exactly either. So as well as how
+long each follows the doubles, this compares what can be seen: how fast
+the balls move, how often they overlap, and whether any escape the panel.
+
+    PYTHONPATH=.:emulated python3 benchmarks/fixed_point.py
+"""
+
+import random
+import time
+
+from smartdisplay.balls import BUSY_SIZE, Balls, FixedBalls, MAX_SIZE
+
+STEP_TIME = 100
+
+ENGINES = ("DoubleBalls", "Balls", "FixedBalls")
+
+# Ten minutes of steps.
+STEPS = 10 * 60 * 1000 // STEP_TIME
+
+
+class DoubleBalls(Balls):
+    TYPECODE = "d"
+
+
+def make_balls(engine, count: int, max_size: int):
+    random.seed(count)
+    balls = engine(count, max_size)
+    for _ in range(count):
+        balls.add(random.random() * 54 + 5,
+                  random.random() * 54 + 5,
+                  random.randint(1, max_size),
+                  random.random() * 16 - 8,
+                  random.random() * 16 - 8,
+                  None)
+    return balls
+
+
+def drawn(balls: Balls):
+    """Returns the pixel each ball is drawn at."""
+    if balls.FRACTION == 0:
+        return [(round(balls.x[i]), round(balls.y[i]))
+                for i in range(balls.count)]
+    half = 1 << (balls.FRACTION - 1)
+    return [((balls.x[i] + half) >> balls.FRACTION,
+             (balls.y[i] + half) >> balls.FRACTION)
+            for i in range(balls.count)]
+
+
+def speed(balls: Balls) -> float:
+    """
+    Returns the root mean square speed of the balls, in pixels a second,
+    which collisions between balls should keep the same.
+    """
+    one = 1 << balls.FRACTION
+    return (sum((balls.vx[i] / one) ** 2 + (balls.vy[i] / one) ** 2
+                for i in range(balls.count)) / balls.count) ** 0.5
+
+
+def overlapping(balls: Balls) -> int:
+    positions = drawn(balls)
+    count = 0
+    for i in range(balls.count - 1):
+        for j in range(i + 1, balls.count):
+            dx = positions[i][0] - positions[j][0]
+            dy = positions[i][1] - positions[j][1]
+            reach = balls.size[i] + balls.size[j] - 1
+            if dx * dx + dy * dy < reach * reach:
+                count += 1
+    return count
+
+
+def escaped(balls: Balls) -> int:
+    return sum(1 for x, y in drawn(balls)
+               if x < 0 or y < 0 or x > 63 or y > 63)
+
+
+def apart(a, b) -> int:
+    """Returns how far apart, in pixels, the balls are drawn."""
+    return max(max(abs(p[0] - q[0]), abs(p[1] - q[1]))
+               for p, q in zip(drawn(a), drawn(b)))
+
+
+def free_flight() -> None:
+    print(f"One ball, {STEPS} steps, drawn apart from doubles")
+    for seed in range(5):
+        random.seed(seed)
+        start = (random.random() * 54 + 5, random.random() * 54 + 5,
+                 random.random() * 16 - 8, random.random() * 16 - 8)
+        engines = [DoubleBalls(1), Balls(1), FixedBalls(1)]
+        for balls in engines:
+            balls.add(*start[:2], 3, *start[2:], None)
+        worst = [0, 0]
+        differ = [0, 0]
+        for _ in range(STEPS):
+            for balls in engines:
+                balls.update(STEP_TIME)
+            for n in range(2):
+                off = apart(engines[0], engines[n + 1])
+                worst[n] = max(worst[n], off)
+                differ[n] += off > 0
+        print(f"  seed {seed}: "
+              + ", ".join(f"{ENGINES[n + 1]} {differ[n] / STEPS:6.2%}"
+                          f" of steps, by at most {worst[n]}"
+                          for n in range(2)))
+
+
+def collisions(count: int, max_size: int) -> None:
+    print(f"{count} balls of radius 1 to {max_size}, {STEPS} steps")
+    print("             follows   speed  end speed  overlaps  escaped"
+          "     time")
+    engines = [make_balls(engine, count, max_size)
+               for engine in (DoubleBalls, Balls, FixedBalls)]
+    start_speed = speed(engines[0])
+
+    follows = [STEPS, STEPS, STEPS]
+    overlaps = [0, 0, 0]
+    escapes = [0, 0, 0]
+    times = [0.0, 0.0, 0.0]
+    for step in range(STEPS):
+        for n, balls in enumerate(engines):
+            start = time.perf_counter()
+            balls.update(STEP_TIME)
+            balls.collide_all()
+            times[n] += time.perf_counter() - start
+            if step % 10 == 0:
+                overlaps[n] += overlapping(balls)
+                escapes[n] += escaped(balls)
+            if follows[n] == STEPS and apart(engines[0], balls) > 1:
+                follows[n] = step
+
+    for n, balls in enumerate(engines):
+        print(f"  {ENGINES[n]:11} {follows[n]:7}  {start_speed:6.2f}"
+              f"  {speed(balls):9.2f}  {overlaps[n]:8}  {escapes[n]:7}"
+              f"  {times[n] * 1000 / STEPS:6.3f}ms")
+
+
+def main() -> None:
+    free_flight()
+    collisions(5, MAX_SIZE)
+    collisions(200, BUSY_SIZE)
+
+
+if __name__ == "__main__":
+    main()
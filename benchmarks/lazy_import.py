@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures what importing the smartdisplay package costs before any screen
+is shown: the time taken, the memory the new modules hold, and how many
+of the package's modules are loaded.
+
+On MicroPython the memory is the drop in gc.mem_free(). CPython has no
+gc.mem_free, so there it is what tracemalloc saw still allocated after
+the import.
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/lazy_import.py
+"""
+
+import gc
+import sys
+import time
+
+
+# The modules outside the package that it, or its screens, import. These
+# are loaded first, so only the package's own modules are measured.
+DEPENDENCIES = ("array", "binascii", "collections", "errno", "i75",
+                "i75.graphics", "i75.image", "i75.tz", "io", "json",
+                "machine", "math", "os", "picographics", "random", "socket",
+                "struct", "urequests")
+
+
+def main() -> None:
+    for name in DEPENDENCIES:
+        __import__(name)
+
+    gc.collect()
+    # The emulator gives CPython a gc.mem_free, which always reports the
+    # same figure.
+    if sys.implementation.name == "micropython":
+        before = gc.mem_free()
+        start = time.ticks_ms()
+        import smartdisplay  # noqa: F401
+        taken = time.ticks_diff(time.ticks_ms(), start)
+        gc.collect()
+        used = before - gc.mem_free()
+    else:
+        import tracemalloc
+        tracemalloc.start()
+        begin = time.perf_counter()
+        import smartdisplay  # noqa: F401
+        taken = (time.perf_counter() - begin) * 1000
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+    modules = [name for name in sys.modules
+               if name.startswith("smartdisplay.")]
+    print(f"{len(modules)} modules loaded, {used} bytes, {taken:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares the time taken and memory allocated decoding the solar and weather
+payloads from JSON and from their packed form.
+
+Run from the top of the repository, with i75's emulated modules on the
+path:
+
+    PYTHONPATH=.:emulated python3 benchmarks/packed_payloads.py
+
+or copy it to the board alongside smartdisplay/ and run it there, where it
+uses gc.mem_alloc rather than tracemalloc.
+"""
+
+import gc
+import json
+import time
+
+from smartdisplay.current_weather import WeatherData
+from smartdisplay.solar import SolarData
+
+ROUNDS = 1000
+
+PAYLOADS = [
+    (SolarData, {
+        "battery": 73.0, "battery_change": 612.0, "pv_power": 2.31,
+        "pv_generation": 5.42, "current_power": -312.0, "house_load": 0.84,
+        "house_wh": 4512.0, "house_cost": 1.23, "car_wh": 2010.0,
+        "car_cost": 0.5,
+    }),
+    (WeatherData, {
+        "temperature": 14.2, "humidity": 70.0, "rain_20m": 0.0,
+        "rain_1h": 0.1, "rain_24h": 2.3, "lux": 5012.0, "uv": 3.0,
+        "wind": 3.2, "gust": 5.1, "pressure": 1012.3, "winddir": "SW",
+        "pressure_change": "increasing", "pressure_text": "Fair",
+    }),
+]
+
+
+def allocated(fn, arg):
+    """Returns the bytes allocated by one call of fn(arg)."""
+    if hasattr(gc, "mem_alloc"):
+        gc.collect()
+        before = gc.mem_alloc()
+        fn(arg)
+        return gc.mem_alloc() - before
+
+    import tracemalloc
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def timed(fn, arg):
+    """Returns the average microseconds taken by fn(arg)."""
+    start = time.ticks_us() if hasattr(time, "ticks_us") \
+        else time.perf_counter_ns() // 1000
+    for _ in range(ROUNDS):
+        fn(arg)
+    end = time.ticks_us() if hasattr(time, "ticks_us") \
+        else time.perf_counter_ns() // 1000
+    return (end - start) / ROUNDS
+
+
+def main() -> None:
+    for cls, data in PAYLOADS:
+        as_json = json.dumps(data).encode("utf-8")
+        packed = cls.from_json(data).pack()
+
+        def from_json(body):
+            return cls.from_json(json.loads(body))
+
+        print(cls.__name__)
+        for name, fn, body in [("json", json.loads, as_json),
+                               ("json+slots", from_json, as_json),
+                               ("packed", cls.unpack, packed)]:
+            print(f"  {name:>10}: {len(body):4d} bytes on the wire, "
+                  f"{timed(fn, body):7.2f}us, "
+                  f"{allocated(fn, body):5d} bytes allocated")
+
+
+if __name__ == "__main__":
+    main()
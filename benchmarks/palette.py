@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares picking a ball colour by converting a random hue and creating a
+pen for it, as before, with picking from the hue wheel, and counts the
+pens each creates over a day of busy balls.
+
+Run from the top of the repository on the emulator:
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/palette.py
+"""
+
+import random
+import time
+
+import picographics
+from i75 import I75
+
+from smartdisplay.balls import BUSY_BALLS
+from smartdisplay.palette import HUE_WHEEL, from_hsv
+
+# A busy ball grows and shrinks away over four resizes, each a one in five
+# chance every five seconds, so about a twentieth are replaced each time.
+PICKS = 24 * 60 * 60 // 5 * BUSY_BALLS // 20
+
+
+class CountingDisplay:
+    def __init__(self, display) -> None:
+        self.display = display
+        self.pens = 0
+
+    def create_pen(self, r, g, b):
+        self.pens += 1
+        return self.display.create_pen(r, g, b)
+
+
+def convert(i75):
+    return i75.display.create_pen(*from_hsv(random.random(), 1.0, 1.0))
+
+
+def wheel(i75):
+    return HUE_WHEEL.random(i75)
+
+
+def timed(i75, pick):
+    i75.display.pens = 0
+    start = time.perf_counter()
+    for _ in range(PICKS):
+        pick(i75)
+    elapsed = (time.perf_counter() - start) * 1000000 / PICKS
+    return f"{elapsed:5.2f}us a colour, {i75.display.pens} pens"
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    i75.display = CountingDisplay(i75.display)
+
+    print(f"{PICKS} colours, a day of busy balls")
+    print(f"  convert: {timed(i75, convert)}")
+    print(f"    wheel: {timed(i75, wheel)}")
+
+
+if __name__ == "__main__":
+    main()
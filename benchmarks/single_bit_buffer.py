@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Times each SingleBitBuffer operation on a 64x64 buffer. The single pixel
+operations are compared with the float division they used to do, and the
+bulk operations with doing the same a pixel at a time.
+
+Run from the top of the repository on the emulator:
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/single_bit_buffer.py
+"""
+
+import math
+import time
+
+import picographics
+from i75 import I75
+
+from smartdisplay.single_bit_buffer import SingleBitBuffer
+
+ROUNDS = 20
+
+
+class FloatBuffer(SingleBitBuffer):
+    """SingleBitBuffer as it was, finding bytes with float division."""
+    def pixel(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return
+        self._is_dirty = True
+        byte = self._row_width * y + math.floor(x / 8.0)
+        self._data[byte] = self._data[byte] | (1 << (x % 8))
+
+    def clear_pixel(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return
+        byte = self._row_width * y + math.floor(x / 8.0)
+        self._data[byte] = self._data[byte] & ~(1 << (x % 8))
+
+    def is_pixel_set(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        byte = self._row_width * y + math.floor(x / 8.0)
+        return (self._data[byte] & (1 << (x % 8))) != 0
+
+    def is_pixel_group_set(self, x, y):
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return False
+        byte = self._row_width * y + math.floor(x / 8.0)
+        return self._data[byte] != 0
+
+    def reset(self):
+        if not self._is_dirty:
+            return
+        for b in range(len(self._data)):
+            self._data[b] = 0
+        self._is_dirty = False
+
+
+def every_pixel(fn):
+    for y in range(64):
+        for x in range(64):
+            fn(x, y)
+
+
+def every_group(fn):
+    for y in range(64):
+        for x in range(0, 64, 8):
+            fn(x, y)
+
+
+def pixel_rect(buffer):
+    for y in range(8, 56):
+        for x in range(8, 56):
+            buffer.pixel(x, y)
+
+
+def pixel_spans(buffer):
+    for y in range(64):
+        for x in range(8, 56):
+            buffer.pixel(x, y)
+
+
+def pixel_span_test(buffer):
+    for y in range(64):
+        for x in range(64):
+            if buffer.is_pixel_set(x, y):
+                break
+
+
+def pixel_blit(i75, buffer, pen):
+    i75.display.set_pen(pen)
+    for y in range(64):
+        for x in range(64):
+            if buffer.is_pixel_set(x, y):
+                i75.display.pixel(x, y)
+
+
+def pixel_or(buffer, other):
+    for y in range(64):
+        for x in range(64):
+            if other.is_pixel_set(x, y):
+                buffer.pixel(x, y)
+
+
+def dirty_reset(buffer):
+    buffer.pixel(0, 0)
+    buffer.reset()
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000000 / ROUNDS
+
+
+def compare(name, old, new) -> None:
+    print(f"  {name:24} {old:9.1f}us {new:9.1f}us  {old / new:5.1f}x")
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    pen = i75.display.create_pen(255, 255, 255)
+    old, new = FloatBuffer(64, 64), SingleBitBuffer(64, 64)
+    old.fill_rect(8, 8, 48, 48)
+    new.fill_rect(8, 8, 48, 48)
+    other = SingleBitBuffer(64, 64)
+    other.fill_rect(0, 0, 32, 64)
+    scratch = SingleBitBuffer(64, 64)
+
+    print("Whole buffer, each pixel     float     shifts")
+    for name in ("pixel", "clear_pixel", "is_pixel_set"):
+        compare(name,
+                timed(every_pixel, getattr(old, name)),
+                timed(every_pixel, getattr(new, name)))
+    compare("is_pixel_group_set",
+            timed(every_group, old.is_pixel_group_set),
+            timed(every_group, new.is_pixel_group_set))
+    compare("reset", timed(dirty_reset, old), timed(dirty_reset, new))
+
+    print("Bulk operations          per pixel       bulk")
+    compare("fill_rect 48x48",
+            timed(pixel_rect, scratch),
+            timed(scratch.fill_rect, 8, 8, 48, 48))
+    compare("set_span x 64 rows",
+            timed(pixel_spans, scratch),
+            timed(lambda: [scratch.set_span(8, 56, y) for y in range(64)]))
+    scratch.reset()
+    compare("is_span_set x 64 rows",
+            timed(pixel_span_test, scratch),
+            timed(lambda: [scratch.is_span_set(0, 64, y)
+                           for y in range(64)]))
+    compare("or_buffer", timed(pixel_or, scratch, other),
+            timed(scratch.or_buffer, other))
+    print(f"  {'and_buffer':24} {'':11} "
+          f"{timed(scratch.and_buffer, other):9.1f}us")
+    print(f"  {'xor_buffer':24} {'':11} "
+          f"{timed(scratch.xor_buffer, other):9.1f}us")
+    compare("blit",
+            timed(pixel_blit, i75, new, pen),
+            timed(new.blit, i75, pen))
+
+
+if __name__ == "__main__":
+    main()
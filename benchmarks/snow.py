@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures how the time to move the Christmas snow grows with the number of
+flakes, with an object per flake as before, and with the flakes held in a
+SnowField, and the time of a whole frame of the field, drawn through a
+compositor on the emulator. Also reports the memory a field update
+allocates, as benchmarks/balls.py does.
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated python3 benchmarks/snow.py
+"""
+
+import gc
+import random
+import time
+
+import picographics
+from i75 import I75
+
+from smartdisplay.compositor import Compositor
+from smartdisplay.snow import SnowField
+
+FRAMES = 200
+FRAME_TIME = 50
+
+COUNTS = (8, 50, 100, 200, 400, 800)
+
+# The speeds of the flakes, as Christmas's far snow.
+SLOWEST, FASTEST = 50, 300
+
+
+class Snowflake:
+    """A flake as Christmas held them, before the SnowField."""
+    def __init__(self) -> None:
+        self.pos = (random.randint(10, 55), random.randint(0, 60))
+        self.move_to = self.pos
+
+        self._dir = 1 if random.randint(0, 1) == 1 else -1
+        self._bounce = random.randint(3, 10)
+        self._delay = 0
+        self._speed = random.randint(SLOWEST, FASTEST)
+
+    def update(self, frame_time: int) -> None:
+        self._delay += frame_time
+        if self._delay >= self._speed:
+            self._delay -= self._speed
+            self._bounce -= 1
+            if self._bounce < 0:
+                self._dir = -self._dir
+                self._bounce = 10
+
+            self.move_to = (self.pos[0] + self._dir, self.pos[1] + 1)
+            if self.pos[1] > 64:
+                self.move_to = (random.randint(10, 55), -1)
+        self.pos = self.move_to
+
+
+def objects_frame(flakes) -> None:
+    for flake in flakes:
+        flake.update(FRAME_TIME)
+
+
+def field_frame(field: SnowField) -> None:
+    field.update(FRAME_TIME)
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / FRAMES
+
+
+def allocated(field: SnowField) -> str:
+    field_frame(field)
+    if hasattr(gc, "mem_alloc"):
+        gc.collect()
+        gc.disable()
+        before = gc.mem_alloc()
+        for _ in range(FRAMES):
+            field_frame(field)
+        used = gc.mem_alloc() - before
+        gc.enable()
+        return f"{used / FRAMES:.1f} bytes allocated an update"
+
+    import tracemalloc
+    tracemalloc.start()
+    peak = 0
+    for _ in range(FRAMES):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        field_frame(field)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return f"at most {peak} bytes in use during an update"
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    black = i75.display.create_pen(0, 0, 0)
+    white = i75.display.create_pen(255, 255, 255)
+
+    random.seed(1)
+    print(allocated(SnowField(64, 64, ((200, SLOWEST, FASTEST), ))))
+
+    print(f"Milliseconds a frame, at {FRAME_TIME}ms frames")
+    print("  flakes   objects     field  field drawn")
+    for count in COUNTS:
+        random.seed(1)
+        flakes = [Snowflake() for _ in range(count)]
+        objects = timed(objects_frame, flakes)
+
+        field = SnowField(64, 64, ((count, SLOWEST, FASTEST), ))
+        update = timed(field_frame, field)
+
+        compositor = Compositor(64, 64, black)
+        masks = [compositor.add_layer(white)]
+        field.set_pixels(masks)
+        compositor.render(i75)
+
+        def drawn_frame() -> None:
+            field.update(FRAME_TIME)
+            field.draw(i75, compositor, masks)
+            compositor.update(i75)
+
+        drawn = timed(drawn_frame)
+        print(f"  {count:6} {objects:9.3f} {update:9.3f} {drawn:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
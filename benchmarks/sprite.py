@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares erasing and drawing the Christmas snowflakes by testing every
+pixel of the image, as before, with moving sprites on a compositor, which
+walks just the lit pixels of each.
+
+Run on the emulator from the top of the repository, once convert.sh has
+made the images:
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/sprite.py
+"""
+
+import itertools
+import time
+
+import picographics
+from i75 import Colour, I75, Image
+
+from smartdisplay.compositor import Compositor
+from smartdisplay.sprite import Sprite
+
+ROUNDS = 50
+
+# Where the eight snowflakes are, some over the text.
+FLAKES = [(10, 5), (20, 12), (30, 20), (40, 28),
+          (50, 36), (15, 44), (35, 50), (45, 8)]
+
+
+def image_frame(i75, image, mask, colours):
+    text, background, snow = colours
+    for x, y in FLAKES:
+        for dx in range(0, image.width):
+            for dy in range(0, image.height):
+                if image._is_pixel(dx, dy):
+                    if mask.is_pixel_set(x + dx, y + dy):
+                        text.set_colour(i75)
+                    else:
+                        background.set_colour(i75)
+                    i75.display.pixel(x + dx, y + dy)
+    for x, y in FLAKES:
+        snow.set_colour(i75)
+        for dx in range(0, image.width):
+            for dy in range(0, image.height):
+                if image._is_pixel(dx, dy):
+                    i75.display.pixel(x + dx, y + dy)
+
+
+def sprite_frame(i75, compositor, offsets):
+    # Each frame moves every snowflake a pixel across and the next moves it
+    # back, so each frame erases and draws them all.
+    offset = next(offsets)
+    for number, (x, y) in enumerate(FLAKES):
+        compositor.move(number, x + offset, y)
+    compositor.update(i75)
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def snapshot(i75):
+    return [list(row) for row in i75.display._driver._buffer]
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    image = Image.load(open("images/snowflake.i75", "rb"))
+    sprite = Sprite.from_image(image)
+    colours = (Colour.fromrgb(255, 50, 50), Colour.fromrgb(0, 0, 0),
+               Colour.fromrgb(255, 255, 255))
+    pens = tuple(i75.display.create_pen(c.r, c.g, c.b) for c in colours)
+
+    compositor = Compositor(64, 64, pens[1])
+    mask = compositor.add_layer(pens[0])
+    mask.fill_rect(0, 20, 64, 20)
+    for x, y in FLAKES:
+        compositor.add_sprite(sprite, x, y, pens[2])
+
+    compositor.render(i75)
+    image_frame(i75, image, mask, colours)
+    expected = snapshot(i75)
+    compositor.render(i75)
+    offsets = itertools.cycle((1, 0))
+    sprite_frame(i75, compositor, offsets)
+    sprite_frame(i75, compositor, offsets)
+    assert snapshot(i75) == expected
+
+    print(f"{len(FLAKES)} snowflakes, {len(sprite.offsets) // 2} of "
+          f"{image.width * image.height} pixels lit")
+    print(f"   image: {timed(image_frame, i75, image, mask, colours):6.2f}ms"
+          " a frame")
+    print(f"  sprite: {timed(sprite_frame, i75, compositor, offsets):6.2f}ms"
+          " a frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares measuring the screens' labels with i75.text_boundingbox and
+through the text metrics cache.
+
+Run from the top of the repository, with i75's emulated modules on the
+path:
+
+    PYTHONPATH=.:emulated python3 benchmarks/text_metrics.py
+"""
+
+import time
+
+import i75
+
+from smartdisplay.house_temperature import FONT, ROOMS, TITLE
+from smartdisplay.text_metrics import TEXT_METRICS, text_boundingbox
+
+ROUNDS = 100
+
+LABELS = [TITLE] + [room.title for room in ROOMS] \
+    + ["Rain: ", "Gust: ", "Avg: ", "UV: ", "24h:", "1h:", "House:", "Car:"]
+
+
+def timed(measure) -> float:
+    """Returns the average microseconds to measure every label."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for label in LABELS:
+            measure(FONT, label)
+    return (time.perf_counter() - start) * 1000000 / ROUNDS
+
+
+def main() -> None:
+    print(f"{len(LABELS)} labels")
+    print(f"  uncached: {timed(i75.text_boundingbox):8.1f}us")
+    print(f"    cached: {timed(text_boundingbox):8.1f}us")
+    print(f"  {TEXT_METRICS.stats()}")
+
+
+if __name__ == "__main__":
+    main()
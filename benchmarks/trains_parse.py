@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compares the memory used parsing ever longer lists of departures, all at
+once with json.loads and in chunks with DeparturesParser. Both the memory
+still held by the result, and the peak while parsing, are shown.
+
+Each body is parsed once before it is measured, so the text measurements
+the parser makes for each train are already cached, as they are when the
+screen is shown again, and only the parse itself is counted.
+
+Run from the top of the repository, with i75's emulated modules on the
+path:
+
+    PYTHONPATH=.:emulated python3 benchmarks/trains_parse.py
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+
+from smartdisplay.trains import CHUNK_SIZE, DeparturesParser
+
+
+def departures(count):
+    return json.dumps({
+        "msg": "Disruption between Sevenoaks and London Bridge",
+        "trains": [{
+            "scheduled": f"08:{i % 60:02d}",
+            "destination": "London Charing Cross",
+            "platform": "2",
+            "eta": "Delayed",
+            "is_late": True,
+            "message": "This train has been delayed by a signalling problem",
+        } for i in range(count)],
+    }).encode("utf-8")
+
+
+def parse_all(body):
+    return json.loads(body)
+
+
+def parse_chunks(body):
+    parser = DeparturesParser()
+    buf = bytearray(CHUNK_SIZE)
+    for start in range(0, len(body), CHUNK_SIZE):
+        n = min(CHUNK_SIZE, len(body) - start)
+        buf[:n] = body[start:start + n]
+        parser.feed(buf, n)
+    return parser.result()
+
+
+def measure(fn, body):
+    fn(body)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(body)
+    taken = time.perf_counter() - start
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(result["trains"]), held, peak, taken * 1000
+
+
+def main() -> None:
+    for count in [4, 10, 40, 160]:
+        body = departures(count)
+        print(f"{count:3d} trains, {len(body):5d} bytes")
+        for name, fn in [("json.loads", parse_all),
+                         ("streaming", parse_chunks)]:
+            kept, held, peak, taken = measure(fn, body)
+            print(f"  {name:>10}: {kept:3d} kept, {held:6d} bytes held, "
+                  f"{peak:6d} bytes peak, {taken:6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Measures the time each transition effect takes to draw a frame, at the
+frame rate that Transition.run plays them, and the time to fill an
+offscreen frame buffer.
+
+    SDL_VIDEODRIVER=dummy PYTHONPATH=.:emulated \\
+        python3 benchmarks/transition.py
+"""
+
+import time
+
+import picographics
+from i75 import I75
+
+from smartdisplay.frame_buffer import FrameBuffer
+from smartdisplay.transition import Crossfade, Dissolve, FRAME_TIME, \
+    Slide, Wipe
+
+DURATION = 1000
+ROUNDS = 20
+
+
+def frame(i75, buffer: FrameBuffer, pen) -> None:
+    buffer.set_pen(pen)
+    buffer.clear()
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(*args)
+    return (time.perf_counter() - start) * 1000 / ROUNDS
+
+
+def play(i75, effect, incoming, outgoing) -> int:
+    transition = effect(incoming, DURATION, outgoing)
+    frames = 1
+    while not transition.step(i75, FRAME_TIME):
+        frames += 1
+    return frames
+
+
+def main() -> None:
+    i75 = I75(display_type=picographics.DISPLAY_INTERSTATE75_64X64)
+    incoming = FrameBuffer(i75.display)
+    outgoing = FrameBuffer(i75.display)
+    frame(i75, outgoing, i75.display.create_pen(0, 0, 100))
+    for y in range(64):
+        incoming.set_pen(i75.display.create_pen(y * 4, 100, 0))
+        incoming.fill(0, y, 64, y + 1)
+
+    scratch = FrameBuffer(i75.display)
+    pen = i75.display.create_pen(10, 20, 30)
+    print(f"Clearing a frame buffer: {timed(frame, i75, scratch, pen):.3f}ms")
+
+    print(f"Milliseconds a frame, over {DURATION}ms")
+    for effect in (Wipe, Slide, Dissolve, Crossfade):
+        start = time.perf_counter()
+        frames = play(i75, effect, incoming.data, outgoing.data)
+        total = (time.perf_counter() - start) * 1000
+        print(f"  {effect.__name__:>9}: {total / frames:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
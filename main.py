@@ -15,27 +15,37 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import errno
 import gc
 import picographics
 from i75 import Colour, I75
 try:
-    from typing import Optional
+    from typing import Any, Optional, Tuple, TYPE_CHECKING
+    if TYPE_CHECKING:
+        # Screens are loaded on first use, so this is only for type checking.
+        from smartdisplay.balls import BouncingBalls
 except ImportError:
     pass
 from io import StringIO
 import machine
 import micropython
-import urequests
 import time
 import sys
 
 from secrets import SENTRY_INGEST, SENTRY_KEY, SENTRY_PROJECT_ID
-from smartdisplay import Advent, BouncingBalls, Christmas, Clock, \
-                         CurrentWeather, HouseTemperature, SentryClient, \
-                         Sonos, Trains, Blackout, Solar, WaterGas
+from smartdisplay import CACHED, NEEDS_HEAP, UNLOAD_AFTER_USE, get_screen, \
+                         unload_screen
+from smartdisplay.assets import ASSETS
+from smartdisplay.backend import Backend
+from smartdisplay.cache import DataCache
+from smartdisplay.damage import DamageTracker
+from smartdisplay.frame_buffer import FrameBuffer
+from smartdisplay.sentry import SentryClient
+from smartdisplay.text_metrics import TEXT_METRICS
+from smartdisplay.transition import Dissolve
 
-BACKEND = "127.0.0.1" if I75.is_emulated() else "192.168.1.207"
+BACKEND = Backend("127.0.0.1" if I75.is_emulated() else "192.168.1.207")
+
+CACHE = DataCache()
 
 SENTRY_CLIENT = SentryClient(SENTRY_INGEST, SENTRY_PROJECT_ID, SENTRY_KEY)
 
@@ -43,54 +53,105 @@ SENTRY_CLIENT = SentryClient(SENTRY_INGEST, SENTRY_PROJECT_ID, SENTRY_KEY)
 def get_next_screen(current: str) -> str:
     print("Getting next screen")
     try:
-        r = urequests.get(f"http://{BACKEND}:6001/next_screen?current={current}", timeout=10)
-    except OSError as e:
-        if e.errno == errno.ETIMEDOUT:
-            return "clock"
-        raise
-    try:
-        return r.json()
-    finally:
-        r.close()
-
-
-BALLS: Optional[BouncingBalls] = None
+        return BACKEND.get_json(f"/next_screen?current={current}")
+    except (OSError, ValueError) as e:
+        # Whether the backend is slow, down or failing, the clock needs no
+        # data.
+        print("Failed to get next screen", e)
+        return "clock"
+
+
+BALLS: Optional["BouncingBalls"] = None
+
+# Two image buffers, so the next screen's image can be prefetched while
+# the current screen may still be drawing from its own.
+IMAGES = [bytearray(64 * 64 * 3), bytearray(64 * 64 * 3)]
+
+# How long before the current screen finishes to fetch the next one.
+PREFETCH_TIME = 3000
+
+# The shortest time between two frames, whatever a screen asks for.
+MIN_FRAME_TIME = 50
+
+# How long the dissolve from one screen to the next takes, unless the
+# screen sets a transition_time of its own.
+TRANSITION_TIME = 300
+
+# machine.lightsleep stops the clocks that the HUB75 driver needs to keep
+# refreshing the panel, so only enable this on boards where it doesn't.
+LIGHTSLEEP = False
+
+
+def sleep_until(i75: I75, ticks: int, delay: int) -> None:
+    """Sleep until delay milliseconds after ticks."""
+    remaining = delay - i75.ticks_diff(i75.ticks_ms(), ticks)
+    if remaining <= 0:
+        return
+    lightsleep = getattr(machine, "lightsleep", None) if LIGHTSLEEP else None
+    if lightsleep is None:
+        i75.sleep_ms(remaining)
+    else:
+        lightsleep(remaining)
+
+
+def prefetch_screen(i75: I75, screen_name: str, image: bytearray) -> Any:
+    """
+    Fetch the data the given screen needs from the backend, so creating it
+    doesn't wait on the network. Returns None if there is nothing to fetch.
+    """
+    screen_cls, args = get_screen(screen_name)
+    if not hasattr(screen_cls, "fetch"):
+        return None
+    data = screen_cls.fetch(i75, BACKEND, image, *args)
+    if screen_name in CACHED:
+        CACHE.store(screen_name, data)
+    return data
+
+
+def get_screen_obj(i75: I75,
+                   screen_name: str,
+                   image: bytearray,
+                   data: Any = None):
+    global BALLS
+    print("Next screen", screen_name)
+    if screen_name == "balls" and BALLS is not None:
+        BALLS.reset_timer()
+        return BALLS
 
-IMAGE = bytearray(64 * 64 * 3)
+    if screen_name in NEEDS_HEAP:
+        # Give the screen the memory the images in RAM were using.
+        ASSETS.clear()
+        gc.collect()
 
+    screen_cls, args = get_screen(screen_name)
+    if data is None:
+        screen_obj = screen_cls(i75, BACKEND, image, *args)
+    else:
+        screen_obj = screen_cls(i75, BACKEND, image, *args, data)
 
-def get_screen_obj(i75: I75, screen_name: str):
-    global BALLS
-    print("Next screen", screen_name)
-    if screen_name == "blackout":
-        return Blackout()
-    if screen_name == "sonos":
-        return Sonos(BACKEND, IMAGE, False)
-    if screen_name == "sonos_quick":
-        return Sonos(BACKEND, IMAGE, True)
     if screen_name == "balls":
-        if BALLS is None:
-            BALLS = BouncingBalls(i75)
-        else:
-            BALLS.reset_timer()
-        return BALLS
-    if screen_name == "trains_to_london":
-        return Trains(BACKEND, True)
-    if screen_name == "trains_home":
-        return Trains(BACKEND, False)
-    if screen_name == "house_temperature":
-        return HouseTemperature(BACKEND)
-    if screen_name == "current_weather":
-        return CurrentWeather(BACKEND, IMAGE)
-    if screen_name == "solar":
-        return Solar(BACKEND)
-    if screen_name == "water_gas":
-        return WaterGas(BACKEND)
-    if screen_name == "christmas":
-        return Christmas(i75)
-    if screen_name == "advent":
-        return Advent(i75, BACKEND, IMAGE)
-    return Clock(i75)
+        BALLS = screen_obj
+    return screen_obj
+
+
+def get_fresh_screen_obj(i75: I75,
+                         screen_name: str,
+                         image: bytearray,
+                         data: Any = None) -> Tuple[Any, bool]:
+    """
+    Like get_screen_obj, but if no data was prefetched then the screen is
+    shown straight away from its cached data, marked as stale. Returns the
+    screen, and whether its data should be refreshed once it is showing.
+    """
+    stale = False
+    if data is None and screen_name in CACHED:
+        data = CACHE.load(screen_name)
+        stale = data is not None
+
+    screen_obj = get_screen_obj(i75, screen_name, image, data)
+    if stale:
+        screen_obj.stale = True
+    return screen_obj, stale
 
 
 def main() -> None:
@@ -98,6 +159,14 @@ def main() -> None:
         display_type=picographics.DISPLAY_INTERSTATE75_64X64,
         rotate=0 if I75.is_emulated() else 90)
 
+    # Skip updates that change nothing, and record how much others do.
+    damage = DamageTracker(i75.display)
+    i75.display = damage
+
+    gc.collect()
+    boot_log = f"Boot time: {i75.ticks_ms()}ms\n" \
+        + f"Free memory after boot: {gc.mem_free()}\n"
+
     while not i75.enable_wifi():
         time.sleep_ms(1000)
 
@@ -111,37 +180,166 @@ def main() -> None:
 
     next_ntp = i75.now().hour + 23
 
+    log(boot_log)
+
     ticks = i75.ticks_ms()
     screen = get_next_screen("first")
-    screen_obj = get_screen_obj(i75, screen)
+    image = 0
+    screen_obj, refresh = get_fresh_screen_obj(i75, screen, IMAGES[image])
+    screen_data: Any = None
+
+    next_screen: Optional[str] = None
+    next_data: Any = None
+    transition_start: Optional[int] = None
+    transition_log = ""
+    # The image buffer the last screen has finished with, which the next
+    # screen's first frame is drawn into before it is shown.
+    old_image: Optional[bytearray] = None
+
+    # How long after ticks the current screen next needs a frame.
+    delay = 0
+    wakeups = 0
 
     black = i75.display.create_pen(0, 0, 0)
 
     while True:
+        sleep_until(i75, ticks, max(delay, MIN_FRAME_TIME))
+
         new_ticks = i75.ticks_ms()
         frame_time = i75.ticks_diff(new_ticks, ticks)
-
-        if frame_time < 50:
-            i75.sleep_ms(10)
-            continue
-
         ticks = new_ticks
         now = i75.now()
+        wakeups += 1
 
-        if screen_obj.render(i75, frame_time):
-            if now.hour == next_ntp:
-                i75.set_time()
-                now = i75.now()
-                next_ntp = now.hour + 23
+        if transition_start is not None and old_image is not None \
+                and getattr(screen_obj, "streams", False):
+            # The screen draws as its data downloads, which drawing it
+            # offscreen would hide until it had all arrived.
+            i75.display.set_pen(black)
+            i75.display.clear()
+            finished = screen_obj.render(i75, frame_time)
+            old_image = None
+        elif transition_start is not None and old_image is not None:
+            finished = render_offscreen(i75, screen_obj, frame_time,
+                                        old_image, black)
+        else:
+            finished = screen_obj.render(i75, frame_time)
+
+        if transition_start is not None:
+            # The first frame of the new screen is now drawn.
+            transition_log += "Transition gap: " \
+                + f"{i75.ticks_diff(i75.ticks_ms(), transition_start)}ms\n"
+            if old_image is not None:
+                dissolve_start = i75.ticks_ms()
+                Dissolve(old_image,
+                         getattr(screen_obj, "transition_time",
+                                 TRANSITION_TIME)).run(i75)
+                ticks = i75.ticks_ms()
+                old_image = None
+                transition_log += "Dissolve: " \
+                    + f"{i75.ticks_diff(ticks, dissolve_start)}ms\n"
+            log(transition_log
+                + f"Free memory: {gc.mem_free()}\n"
+                + f"Text metrics: {TEXT_METRICS.stats()}\n"
+                + f"Assets: {ASSETS.stats()}\n")
+            transition_start = None
+
+        if refresh and not finished:
+            # The screen is showing cached data, so try to replace it with
+            # the latest.
+            refresh = False
+            try:
+                data = prefetch_screen(i75, screen, IMAGES[image])
+            except (OSError, ValueError) as e:
+                print("Refresh failed", e)
+            else:
+                screen_obj = get_screen_obj(i75, screen, IMAGES[image], data)
+                screen_data = data
+                i75.display.set_pen(black)
+                i75.display.fill(0, 0, 64, 64)
+                delay = 0
+                continue
+
+        if not finished:
+            delay = screen_obj.next_frame()
+            time_left = screen_obj.time_left()
+            if next_screen is None and time_left is not None:
+                if time_left <= PREFETCH_TIME:
+                    next_screen = get_next_screen(screen)
+                    try:
+                        next_data = prefetch_screen(i75,
+                                                    next_screen,
+                                                    IMAGES[1 - image])
+                    except (OSError, ValueError) as e:
+                        # Fall back to the cache, or leave it to the screen
+                        # to fetch its own data.
+                        print("Prefetch failed", e)
+                        next_data = None
+                else:
+                    delay = min(delay, time_left - PREFETCH_TIME)
+            continue
 
-            screen = get_next_screen(screen)
-            screen_obj = get_screen_obj(i75, screen)
+        transition_start = i75.ticks_ms()
+        transition_log = f"Wakeups: {screen} {wakeups}\n" \
+            + f"Damage: {damage.stats()}\n"
+        damage.reset_stats()
+        delay, wakeups = 0, 0
+
+        if now.hour == next_ntp:
+            i75.set_time()
+            now = i75.now()
+            next_ntp = now.hour + 23
+
+        old_screen = screen
+        screen = get_next_screen(screen) if next_screen is None \
+            else next_screen
+
+        if screen == old_screen and next_data is not None \
+                and next_data is screen_data \
+                and hasattr(screen_obj, "restart"):
+            # The backend said the data hasn't changed, so what is on the
+            # display is still right.
+            screen_obj.restart()
+            next_screen, next_data = None, None
+            continue
 
-            gc.collect()
-            log(f"Free memory: {gc.mem_free()}\n")
+        image = 1 - image
+        screen_obj, refresh = get_fresh_screen_obj(i75,
+                                                   screen,
+                                                   IMAGES[image],
+                                                   next_data)
+        screen_data = None if refresh else next_data
+        next_screen, next_data = None, None
+
+        if old_screen in UNLOAD_AFTER_USE and old_screen != screen:
+            unload_screen(old_screen)
+
+        gc.collect()
+
+        old_image = IMAGES[1 - image]
+
+
+def render_offscreen(i75: I75,
+                     screen_obj: Any,
+                     frame_time: int,
+                     buffer: bytearray,
+                     black: Any) -> bool:
+    """
+    Draws the first frame of screen_obj offscreen, into buffer, so it can be
+    dissolved to. Returns whether the screen has finished.
+    """
+    display = i75.display
+    offscreen = FrameBuffer(display, buffer)
+    offscreen.set_pen(black)
+    offscreen.clear()
+
+    i75.display = offscreen
+    try:
+        finished = screen_obj.render(i75, frame_time)
+    finally:
+        i75.display = display
 
-            i75.display.set_pen(black)
-            i75.display.fill(0, 0, 64, 64)
+    return finished
 
 
 def main_safe():
@@ -165,21 +363,18 @@ def main_safe():
 
 
 def log(msg: str) -> None:
-    r = None
     try:
-        r = urequests.post(f"http://{BACKEND}:6001/log", data=msg)
-    finally:
-        if r is not None:
-            r.close()
+        BACKEND.post("/log", msg)
+    except (OSError, ValueError):
+        # Keep the display running while the backend is away.
+        print(msg)
 
 
 def log_error(error: str) -> None:
-    r = None
     try:
-        r = urequests.post(f"http://{BACKEND}:6001/error", data=error)
-    finally:
-        if r is not None:
-            r.close()
+        BACKEND.post("/error", error)
+    except (OSError, ValueError):
+        print(error)
 
 
 if __name__ == "__main__":
@@ -15,15 +15,5 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .advent import Advent
-from .balls import BouncingBalls
-from .blackout import Blackout
-from .clock import Clock
-from .christmas import Christmas
-from .current_weather import CurrentWeather
-from .house_temperature import HouseTemperature
-from .sentry import SentryClient
-from .solar import Solar
-from .sonos import Sonos
-from .trains import Trains
-from .water_gas import WaterGas
+from .registry import CACHED, NEEDS_HEAP, SCREENS, UNLOAD_AFTER_USE, \
+    get_screen, unload_screen
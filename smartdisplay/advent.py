@@ -15,25 +15,62 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import urequests
+try:
+    from typing import Optional
+except ImportError:
+    pass
 
-from i75 import Date, Colour, I75, Image, render_text, text_boundingbox
+from i75 import Date, Colour, I75, ThreeColourImage, render_text
+
+from .backend import Backend
+from .text_metrics import text_boundingbox
+from .transition import Wipe
 
 FONT = "cg_pixel_3x5_5"
 
 
 class Advent:
-    def __init__(self, i75: I75, backend: str, image: bytearray) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 data: Optional[bool] = None) -> None:
         self.backend = backend
         self.total_time = 0
         self.rendered = False
-        self.opened = 64
+        self.wipe = Wipe(image, 5000, max_step=5)
         self.image = image
+        self.prefetched = data is not None
         self.state = 1
         self.image_count = 1
+        self.day = i75.now().date().day
 
-    def render(self, i75: I75, frame_time: int) -> bool:
+    @staticmethod
+    def fetch(i75: I75, backend: Backend, image: bytearray) -> bool:
         day = i75.now().date().day
+        return Advent.fetch_picture(backend, image, day if day < 26 else 1)
+
+    @staticmethod
+    def fetch_picture(backend: Backend, image: bytearray, day: int) -> bool:
+        """Fetch the picture for the given day into image."""
+        backend.get_into(f"/image?file=advent/{day:02d}.png", image)
+        return True
+
+    def time_left(self) -> Optional[int]:
+        if self.state == 4 and (self.day < 26 or self.image_count == 25):
+            return 15000 - self.total_time
+        return None
+
+    def next_frame(self) -> int:
+        if self.state == 2:
+            return 10000 - self.total_time
+        if self.state == 3:
+            return 50
+        time_left = self.time_left()
+        return 0 if time_left is None else time_left
+
+    def render(self, i75: I75, frame_time: int) -> bool:
+        day = self.day = i75.now().date().day
 
         if self.rendered:
             if self.state == 1:
@@ -41,24 +78,12 @@ class Advent:
                 return False
             if self.state == 2:
                 self.total_time += frame_time
-                if self.total_time > 10000:
+                if self.total_time >= 10000:
                     self.total_time = 0
                     self.state = 3
                 return False
             if self.state == 3:
-                self.total_time += frame_time
-                to_open = round(64 - 64 * self.total_time / 5000)
-                to_open = max(to_open, self.opened - 5, 0)
-                for y in range(64):
-                    for x in range(to_open, self.opened):
-                        Colour.fromrgb(self.image[(y * 64 + x) * 3],
-                                       self.image[(y * 64 + x) * 3 + 1],
-                                       self.image[(y * 64 + x) * 3 + 2]
-                                       ).set_colour(i75)
-                        i75.display.pixel(x, y)
-                self.opened = to_open
-                i75.display.update()
-                if self.opened == 0:
+                if self.wipe.step(i75, frame_time):
                     self.total_time = 0
                     self.state = 4
                 return False
@@ -70,29 +95,20 @@ class Advent:
                 return self.total_time >= 15000
             if self.state == 4:
                 self.image_count += 1
-                try:
-                    r = urequests.get(f"http://{self.backend}:6001/image?file=advent/{self.image_count:02d}.png",
-                                        stream=True, timeout=10)
-                    r.raw.readinto(self.image)
-                finally:
-                    r.close()
+                Advent.fetch_picture(self.backend,
+                                     self.image,
+                                     self.image_count)
                 self.state = 3
-                self.opened = 64
+                self.wipe = Wipe(self.image, 5000, max_step=5)
                 return False
             raise ValueError(f"Invalid state {self.state}")
 
         self.rendered = True
 
-        Image.load_into_buffer(open("images/christmas_wreath.i75", "rb"),
-                               self.image)
-
-        for y in range(64):
-            for x in range(64):
-                Colour.fromint32(self.image[(y * 64 + x) * 3] << 24
-                                 | self.image[(y * 64 + x) * 3 + 1] << 16
-                                 | self.image[(y * 64 + x) * 3 + 2] << 8
-                                 | 255).set_colour(i75)
-                i75.display.pixel(x, y)
+        # Draw the wreath straight from flash, so a prefetched picture in
+        # the image buffer isn't overwritten.
+        with open("images/christmas_wreath.i75", "rb") as fp:
+            ThreeColourImage.render_from_file(fp, i75.display, 0, 0)
 
         Colour.fromrgb(0, 0, 255).set_colour(i75)
 
@@ -102,12 +118,7 @@ class Advent:
 
         i75.display.update()
 
-        try:
-            image_day = day if day < 26 else 1
-            r = urequests.get(f"http://{self.backend}:6001/image?file=advent/{image_day:02d}.png",
-                                stream=True, timeout=10)
-            r.raw.readinto(self.image)
-        finally:
-            r.close()
+        if not self.prefetched:
+            Advent.fetch(i75, self.backend, self.image)
 
         return False
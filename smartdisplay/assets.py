@@ -0,0 +1,96 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+try:
+    from typing import Any
+except ImportError:
+    pass
+
+from i75 import Image
+
+# Enough for every icon, the train headers and the water and gas images,
+# but not the full screen pictures, which are read from flash as needed.
+ASSET_BUDGET = 8 * 1024
+
+
+class AssetCache:
+    """
+    Images read from flash, kept decoded in RAM so they are only read
+    once, up to a budget of bytes of image data. When an image doesn't fit
+    the least recently used ones are forgotten to make room, and an image
+    bigger than the whole budget is never kept.
+
+    Images are shared by everything that loads them, so a screen that sets
+    the colour of a single colour image should set it each time it draws
+    it.
+
+    Like LRUCache, an image is moved to the end of the OrderedDict by
+    removing it and adding it again.
+    """
+    def __init__(self, budget: int) -> None:
+        self.budget = budget
+        self.resident = 0
+        self.hits = 0
+        self.misses = 0
+        # Images forgotten to keep within the budget, and those forgotten by
+        # clear, to make room for a screen.
+        self.evictions = 0
+        self.cleared = 0
+        self._images: Any = OrderedDict()
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._images
+
+    def load(self, path: str) -> Image:
+        """Returns the image at path, reading it if it isn't in RAM."""
+        image = self._images.pop(path, None)
+        if image is not None:
+            self.hits += 1
+            self._images[path] = image
+            return image
+
+        self.misses += 1
+        with open(path, "rb") as fp:
+            image = Image.load(fp)
+        size = len(image.data)
+        if size <= self.budget:
+            self._make_room(size)
+            self._images[path] = image
+            self.resident += size
+        return image
+
+    def clear(self) -> None:
+        """Forgets every image, so a screen can have the memory."""
+        self.cleared += len(self._images)
+        self._images = OrderedDict()
+        self.resident = 0
+
+    def stats(self) -> str:
+        return f"{len(self._images)} images, " \
+            + f"{self.resident}/{self.budget} bytes, " \
+            + f"{self.hits} hits, {self.misses} misses, " \
+            + f"{self.evictions} evicted, {self.cleared} cleared"
+
+    def _make_room(self, size: int) -> None:
+        while self._images and self.resident + size > self.budget:
+            path = next(iter(self._images))
+            self.resident -= len(self._images.pop(path).data)
+            self.evictions += 1
+
+
+ASSETS = AssetCache(ASSET_BUDGET)
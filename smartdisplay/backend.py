@@ -0,0 +1,316 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import errno
+import json
+import socket
+try:
+    from typing import Any, Callable, Dict, Optional, Tuple
+except ImportError:
+    pass
+
+
+class Backend:
+    """
+    A small HTTP/1.1 client for the smartdisplay backend.
+
+    A single connection is kept open and reused for every request. If the
+    backend has closed it in the meantime, the request is retried once on
+    a fresh connection.
+
+    Responses are read with :func:`request`, followed by :func:`readinto`
+    until it returns 0, or :func:`finish` to skip the rest of the body.
+
+    If the backend sends an ETag with a JSON response, :func:`get_json`
+    remembers it along with the parsed data, and asks for the body again
+    only if it has changed.
+
+    Screens whose data can also be sent in a packed binary form ask for it
+    with an Accept header, and fall back to JSON if the backend doesn't
+    offer it.
+    """
+    def __init__(self, host: str, port: int = 6001, timeout: int = 10) -> None:
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+
+        self._address: Any = None
+        self._socket: Any = None
+        self._stream: Any = None
+
+        # Used to read whole bodies, and grown as needed.
+        self._buffer = bytearray(1024)
+
+        # Body bytes still to read, in total or in the current chunk.
+        self._remaining = 0
+        self._chunked = False
+        self._keep_alive = True
+        self._etag: Optional[str] = None
+        self._content_type = ""
+
+        # The last ETag and parsed body for each path.
+        self._validators: Dict[str, Tuple[str, Any]] = {}
+
+    def close(self) -> None:
+        """Close the connection. The next request will open a new one."""
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._stream = None
+        self._remaining = 0
+
+    def get_json(self,
+                 path: str,
+                 packed_type: Optional[str] = None,
+                 unpack: Optional[Callable[[Any], Any]] = None,
+                 from_json: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Returns the parsed JSON body of the given path. If it hasn't changed
+        since the last call, the same object is returned again.
+
+        If packed_type is given the backend is asked for a body of that type
+        in preference to JSON, and if it sends one it is decoded by unpack.
+        A JSON body is passed through from_json, if it is given, before it
+        is remembered, so both forms give the same type of object.
+        """
+        validator = self._validators.get(path)
+        status = self.request("GET",
+                              path,
+                              etag=validator[0] if validator else None,
+                              accept=None if packed_type is None
+                              else f"{packed_type}, application/json;q=0.5")
+        if status == 304 and validator is not None:
+            return validator[1]
+
+        body = self._read_all()
+        if unpack is not None and self._content_type == packed_type:
+            data = unpack(body)
+        else:
+            data = json.loads(body)
+            if from_json is not None:
+                data = from_json(data)
+        if self._etag is not None:
+            self._validators[path] = (self._etag, data)
+        elif validator is not None:
+            del self._validators[path]
+        return data
+
+    def get_into(self,
+                 path: str,
+                 buf: bytearray,
+                 progress: Optional[Callable[[int], None]] = None,
+                 step: int = 0) -> int:
+        """
+        Reads the body of the given path into buf, and returns the number of
+        bytes read. Anything that doesn't fit in buf is discarded.
+
+        If progress is given, it is called with the number of bytes read so
+        far after each read, which is at most step bytes if step isn't 0, so
+        the start of buf can be used while the rest is still arriving.
+        """
+        self.request("GET", path)
+        mv = memoryview(buf)
+        read = 0
+        while read < len(buf):
+            end = len(buf) if step == 0 else min(read + step, len(buf))
+            n = self.readinto(mv[read:end])
+            if n == 0:
+                break
+            read += n
+            if progress is not None:
+                progress(read)
+        self.finish()
+        return read
+
+    def post(self, path: str, data: str) -> None:
+        """Post data to the given path, ignoring the response."""
+        self.request("POST", path, data.encode("utf-8"))
+        self.finish()
+
+    def request(self,
+                method: str,
+                path: str,
+                body: Optional[bytes] = None,
+                etag: Optional[str] = None,
+                accept: Optional[str] = None) -> int:
+        """
+        Send a request and read the response headers, returning the status.
+        Raises a ValueError if the status isn't a success, or 304 when an
+        etag was given.
+        """
+        if self._remaining != 0 or self._chunked:
+            self.finish()
+
+        while True:
+            reused = self._stream is not None
+            if not reused:
+                self._connect()
+            try:
+                self._send(method, path, body, etag, accept)
+                status = self._read_headers()
+                break
+            except OSError:
+                self.close()
+                # A kept-alive connection may have been closed by the
+                # backend since we last used it, so try a new one.
+                if not reused:
+                    raise
+
+        if status == 304 and etag is not None:
+            return status
+        if status < 200 or status >= 300:
+            self.finish()
+            raise ValueError(f"{method} {path} returned {status}")
+        return status
+
+    def readinto(self, buf: Any) -> int:
+        """
+        Reads the next part of the response body into buf, returning the
+        number of bytes read, or 0 once the body is finished.
+        """
+        if self._chunked and self._remaining == 0:
+            self._remaining = self._read_chunk_size()
+        if self._remaining == 0 or self._stream is None:
+            self._end_body()
+            return 0
+
+        if self._remaining > 0 and len(buf) > self._remaining:
+            buf = memoryview(buf)[:self._remaining]
+        n = self._stream.readinto(buf)
+        if not n:
+            # The backend closed the connection, which marks the end of
+            # a body without a length, and is an error otherwise.
+            remaining = self._remaining
+            self.close()
+            if remaining > 0:
+                raise OSError(errno.ECONNRESET)
+            return 0
+
+        if self._remaining > 0:
+            self._remaining -= n
+            if self._chunked and self._remaining == 0:
+                self._stream.readline()
+            elif self._remaining == 0:
+                self._end_body()
+        return n
+
+    def finish(self) -> None:
+        """Discard whatever is left of the response body."""
+        mv = memoryview(self._buffer)
+        while self.readinto(mv) > 0:
+            pass
+
+    def _read_all(self) -> bytearray:
+        read = 0
+        while True:
+            if read == len(self._buffer):
+                self._buffer.extend(bytearray(len(self._buffer)))
+            n = self.readinto(memoryview(self._buffer)[read:])
+            if n == 0:
+                return self._buffer[:read]
+            read += n
+
+    def _connect(self) -> None:
+        if self._address is None:
+            self._address = socket.getaddrinfo(self.host, self.port)[0][-1]
+        self._socket = socket.socket()
+        self._socket.settimeout(self.timeout)
+        try:
+            self._socket.connect(self._address)
+        except OSError:
+            self.close()
+            raise
+        self._stream = self._socket.makefile("rwb", 0)
+
+    def _send(self,
+              method: str,
+              path: str,
+              body: Optional[bytes],
+              etag: Optional[str],
+              accept: Optional[str]) -> None:
+        request = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+        if etag is not None:
+            request += f"If-None-Match: {etag}\r\n"
+        if accept is not None:
+            request += f"Accept: {accept}\r\n"
+        if body is not None:
+            request += f"Content-Length: {len(body)}\r\n"
+        self._stream.write(request.encode("utf-8") + b"\r\n")
+        if body is not None:
+            self._stream.write(body)
+
+    def _read_headers(self) -> int:
+        line = self._stream.readline()
+        if not line:
+            raise OSError(errno.ECONNRESET)
+        status = int(line.split(None, 2)[1])
+
+        # Without a length the body runs until the connection is closed.
+        self._remaining = -1
+        self._chunked = False
+        self._keep_alive = True
+        self._etag = None
+        self._content_type = ""
+        while True:
+            line = self._stream.readline()
+            if not line:
+                raise OSError(errno.ECONNRESET)
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("utf-8").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "content-length":
+                self._remaining = int(value)
+            elif name == "transfer-encoding" and value.lower() == "chunked":
+                self._chunked = True
+            elif name == "connection" and value.lower() == "close":
+                self._keep_alive = False
+            elif name == "etag":
+                self._etag = value
+            elif name == "content-type":
+                self._content_type = value.lower().replace(" ", "")
+
+        if status == 304 or status == 204:
+            # These never have a body, whatever the headers say.
+            self._end_body()
+        elif self._chunked:
+            self._remaining = 0
+        elif self._remaining == -1:
+            self._keep_alive = False
+        elif self._remaining == 0:
+            self._end_body()
+        return status
+
+    def _read_chunk_size(self) -> int:
+        if self._stream is None:
+            return 0
+        size = int(self._stream.readline().split(b";")[0], 16)
+        if size == 0:
+            # Skip any trailers, up to the blank line ending the body.
+            while self._stream.readline() not in (b"\r\n", b""):
+                pass
+            self._chunked = False
+        return size
+
+    def _end_body(self) -> None:
+        self._remaining = 0
+        self._chunked = False
+        if not self._keep_alive:
+            self.close()
@@ -17,10 +17,10 @@
 
 # Ball collision code adapted from https://github.com/ekiefl/pooltool/tree/main
 
-import math
+from array import array
 import random
 try:
-    from typing import Tuple, Optional, Union
+    from typing import Any, List, Optional
 except ImportError:
     pass
 import sys
@@ -29,171 +29,360 @@ import picographics
 
 from i75 import I75
 
-
-class Vector:
-    def __init__(self, x: float, y: float) -> None:
-        self.x = x
-        self.y = y
-
-    def unit(self) -> "Vector":
-        length = self.length()
-        return Vector(self.x / length, self.y / length)
-
-    def __add__(self, other: "Vector") -> "Vector":
-        return Vector(self.x + other.x, self.y + other.y)
-
-    def __mul__(self, other: float) -> "Vector":
-        return Vector(self.x * other, self.y * other)
-
-    def __sub__(self, other: "Vector") -> "Vector":
-        return Vector(self.x - other.x, self.y - other.y)
-
-    def __gt__(self, other: Union[int, "Vector"]) -> bool:
-        if isinstance(other, Vector):
-            return (self.x ** 2 + self.y ** 2) > (other.x ** 2 + other.y ** 2)
+from .backend import Backend
+from .palette import HUE_WHEEL
+
+
+# The most balls on the panel at once, and the largest they grow.
+MAX_BALLS = 5
+MAX_SIZE = 6
+
+# The same for busy mode, which fills the panel with small balls.
+BUSY_BALLS = 200
+BUSY_SIZE = 3
+
+# With fewer balls than this, testing every pair is quicker than filling
+# the grid.
+GRID_BALLS = 16
+
+
+class Balls:
+    """
+    The position, motion, size and colour of each ball, held in arrays
+    rather than an object per ball, so a physics step works in place. On
+    the device each float read from the arrays, and each one worked out
+    from them, is still an object on the heap, which FixedBalls avoids.
+
+    To find the balls that might touch, each step sorts the balls into a
+    grid of cells at least as wide as two of the largest balls, so a ball
+    only needs testing against those in its own and neighbouring cells.
+    The cells are linked lists, held in arrays: head has the first ball in
+    each cell, and next_ball the ball after each one, or -1 at the end.
+    """
+    # The type of the position and motion arrays, and the number of bits
+    # of them after the binary point.
+    TYPECODE = "f"
+    FRACTION = 0
+
+    def __init__(self, capacity: int, max_size: int = MAX_SIZE) -> None:
+        self.capacity = capacity
+        self.max_size = max_size
+        self.count = 0
+        self.x: array = array(self.TYPECODE, [0] * capacity)
+        self.y: array = array(self.TYPECODE, [0] * capacity)
+        self.vx: array = array(self.TYPECODE, [0] * capacity)
+        self.vy: array = array(self.TYPECODE, [0] * capacity)
+        self.size = bytearray(capacity)
+        self.growing = bytearray(capacity)
+        self.colour: List[Any] = [None] * capacity
+
+        self.shift = 0
+        while (1 << self.shift) < 2 * max_size:
+            self.shift += 1
+        self.columns = (64 + (1 << self.shift) - 1) >> self.shift
+        self.shift += self.FRACTION
+        self.head = array("h", [-1] * (self.columns * self.columns))
+        self.next_ball = array("h", [-1] * capacity)
+
+    def add(self,
+            x: float,
+            y: float,
+            size: int,
+            vx: float,
+            vy: float,
+            colour: picographics.Pen) -> None:
+        i = self.count
+        if i >= self.capacity:
+            return
+        self.x[i], self.y[i] = x, y
+        self.vx[i], self.vy[i] = vx, vy
+        self.size[i] = size
+        self.growing[i] = size < self.max_size - 1
+        self.colour[i] = colour
+        self.count += 1
+
+    def remove(self, i: int) -> None:
+        """Removes a ball, moving the last ball into its place."""
+        last = self.count - 1
+        self.x[i], self.y[i] = self.x[last], self.y[last]
+        self.vx[i], self.vy[i] = self.vx[last], self.vy[last]
+        self.size[i] = self.size[last]
+        self.growing[i] = self.growing[last]
+        self.colour[i] = self.colour[last]
+        self.colour[last] = None
+        self.count = last
+
+    def update(self, frame_time: int) -> None:
+        """Moves each ball, bouncing it off the edges of the panel."""
+        x, y, vx, vy, size = self.x, self.y, self.vx, self.vy, self.size
+        seconds = frame_time / 1000.0
+        for i in range(self.count):
+            x[i] += vx[i] * seconds
+            y[i] += vy[i] * seconds
+
+            if x[i] - size[i] <= 0:
+                vx[i] = abs(vx[i])
+            if x[i] + size[i] > 63:
+                vx[i] = -abs(vx[i])
+
+            if y[i] - size[i] <= 0:
+                vy[i] = abs(vy[i])
+            if y[i] + size[i] > 63:
+                vy[i] = -abs(vy[i])
+
+    def collide_all(self) -> None:
+        """Bounces every pair of touching balls off each other."""
+        if self.count < GRID_BALLS:
+            self.collide_pairs()
         else:
-            return (self.x ** 2 + self.y ** 2) > other ** 2
-
-    def length(self) -> float:
-        return math.sqrt(self.x ** 2 + self.y ** 2)
-
-    def __str__(self) -> str:
-        return f"<V {self.x} {self.y}>"
-
+            self.collide_grid()
+
+    def collide_pairs(self) -> None:
+        for i in range(self.count - 1):
+            for j in range(i + 1, self.count):
+                self.collide(i, j)
+
+    def collide_grid(self) -> None:
+        shift, columns = self.shift, self.columns
+        head, next_ball = self.head, self.next_ball
+        x, y = self.x, self.y
+
+        for cell in range(len(head)):
+            head[cell] = -1
+        last = columns - 1
+        for i in range(self.count):
+            column = min(max(int(x[i]) >> shift, 0), last)
+            row = min(max(int(y[i]) >> shift, 0), last)
+            cell = row * columns + column
+            next_ball[i] = head[cell]
+            head[cell] = i
+
+        # Test each ball against the rest of its cell, then the cells to
+        # its right and below, so every pair is tested once.
+        for row in range(columns):
+            for column in range(columns):
+                cell = row * columns + column
+                i = head[cell]
+                while i >= 0:
+                    self.collide_list(i, next_ball[i])
+                    if column < last:
+                        self.collide_list(i, head[cell + 1])
+                    if row < last:
+                        below = cell + columns
+                        if column > 0:
+                            self.collide_list(i, head[below - 1])
+                        self.collide_list(i, head[below])
+                        if column < last:
+                            self.collide_list(i, head[below + 1])
+                    i = next_ball[i]
+
+    def collide_list(self, i: int, j: int) -> None:
+        """Collides ball i with ball j, and each ball after it in its cell."""
+        next_ball = self.next_ball
+        while j >= 0:
+            self.collide(i, j)
+            j = next_ball[j]
+
+    def collide(self, i: int, j: int) -> None:
+        """
+        Bounces balls i and j off each other if they touch and are moving
+        together.
+
+        This is an elastic collision between equal masses: ball j gains
+        the part of their relative motion along the line between their
+        centres, and ball i keeps the part across it.
+        """
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        dx = x[i] - x[j]
+        dy = y[i] - y[j]
+        distance = dx * dx + dy * dy
+        reach = self.size[i] + self.size[j]
+        if distance > reach * reach or distance == 0:
+            return
 
-class Matrix:
-    def __init__(self) -> None:
-        self.values = [[0.0, 0.0], [0.0, 0.0]]
+        rvx = vx[i] - vx[j]
+        rvy = vy[i] - vy[j]
 
-    def dot(self, v: Vector) -> Vector:
-        return Vector(self.values[0][0] * v.x + self.values[0][1] * v.y,
-                      self.values[1][0] * v.x + self.values[1][1] * v.y)
+        # Where the balls will be in 10ms. If they are further apart, they
+        # are already moving away from each other.
+        nx = dx + rvx * 0.01
+        ny = dy + rvy * 0.01
+        if nx * nx + ny * ny > distance:
+            return
 
+        along = (dx * rvx + dy * rvy) / distance
+        across = (dy * rvx - dx * rvy) / distance
+        vx[i] = vx[j] + dy * across
+        vy[i] = vy[j] - dx * across
+        vx[j] += dx * along
+        vy[j] += dy * along
 
-class Ball:
-    def __init__(self,
-                 i75: I75,
-                 centre: Vector,
-                 size: int,
-                 motion: Vector) -> None:
-        self.colour = i75.display.create_pen(*from_hsv(random.random(),
-                                                       1.0,
-                                                       1.0))
-        self.centre = centre
-        self.size = size
-        self.motion = motion
-        self.growing = size < 5
-
-    def update(self, frame_time: int):
-        self.centre = self.centre + self.motion * (frame_time / 1000.0)
-
-        if self.centre.x - self.size <= 0:
-            self.motion.x = abs(self.motion.x)
-        if self.centre.x + self.size > 63:
-            self.motion.x = -abs(self.motion.x)
-
-        if self.centre.y - self.size <= 0:
-            self.motion.y = abs(self.motion.y)
-        if self.centre.y + self.size > 63:
-            self.motion.y = -abs(self.motion.y)
-
-    def collide(self, other: "Ball") -> None:
-        distance = self.centre - other.centre
-        if distance > (self.size + other.size):
+    def render(self, i75: I75, colour: Optional[picographics.Pen] = None):
+        display = i75.display
+        x, y, size = self.x, self.y, self.size
+        if colour is not None:
+            display.set_pen(colour)
+        for i in range(self.count):
+            if colour is None:
+                display.set_pen(self.colour[i])
+            display.circle(round(x[i]), round(y[i]), size[i])
+
+    def scale_motion(self, i: int, tenths: int) -> None:
+        self.vx[i] *= tenths / 10
+        self.vy[i] *= tenths / 10
+
+    def resize(self) -> None:
+        """Grows or shrinks some of the balls, removing those that vanish."""
+        for i in range(self.count - 1, -1, -1):
+            if random.random() > 0.2:
+                continue
+            if self.growing[i]:
+                self.size[i] += 1
+                self.scale_motion(i, 9)
+                if self.size[i] >= self.max_size:
+                    self.growing[i] = False
+            else:
+                self.size[i] -= 1
+                self.scale_motion(i, 11)
+                if self.size[i] <= 1:
+                    self.remove(i)
+
+
+class FixedBalls(Balls):
+    """
+    Balls with positions and motion held as integers, in 1/65536ths of a
+    pixel and of a pixel a second, so a physics step does no float maths.
+    Floats are objects on the heap on the device, so this keeps a step
+    from allocating at all.
+
+    Small ints only go up to 2 ** 30, so collisions work out directions in
+    16ths of a pixel, and changes in motion in 256ths.
+    """
+    TYPECODE = "i"
+    FRACTION = 16
+
+    def add(self,
+            x: float,
+            y: float,
+            size: int,
+            vx: float,
+            vy: float,
+            colour: picographics.Pen) -> None:
+        one = 1 << self.FRACTION
+        super().add(int(x * one),
+                    int(y * one),
+                    size,
+                    int(vx * one),
+                    int(vy * one),
+                    colour)
+
+    def update(self, frame_time: int) -> None:
+        x, y, vx, vy, size = self.x, self.y, self.vx, self.vy, self.size
+        fraction = self.FRACTION
+        right = 63 << fraction
+        for i in range(self.count):
+            x[i] += (vx[i] * frame_time + 500) // 1000
+            y[i] += (vy[i] * frame_time + 500) // 1000
+
+            radius = size[i] << fraction
+            if x[i] - radius <= 0:
+                vx[i] = abs(vx[i])
+            if x[i] + radius > right:
+                vx[i] = -abs(vx[i])
+
+            if y[i] - radius <= 0:
+                vy[i] = abs(vy[i])
+            if y[i] + radius > right:
+                vy[i] = -abs(vy[i])
+
+    def collide(self, i: int, j: int) -> None:
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        # Distances in 16ths, and motion in 256ths.
+        to_16ths = self.FRACTION - 4
+        to_256ths = self.FRACTION - 8
+
+        reach = (self.size[i] + self.size[j]) << 4
+        dx = (x[i] - x[j]) >> to_16ths
+        dy = (y[i] - y[j]) >> to_16ths
+        if dx > reach or dx < -reach or dy > reach or dy < -reach:
             return
-
-        next = self.centre + self.motion * 0.01
-        onext = other.centre + other.motion * 0.01
-        if (next - onext) > distance:
+        distance = dx * dx + dy * dy
+        if distance > reach * reach or distance == 0:
             return
 
-        n = (other.centre - self.centre).unit()
-        t = coordinate_rotation(n, math.pi / 2)
-
-        v_rel = self.motion - other.motion
-        v_mag = v_rel.length()
-
-        beta = angle(v_rel, n)
+        # The balls are moving together if their relative motion is
+        # against the line from j to i.
+        rounding = 1 << (to_256ths - 1)
+        rvx = (vx[i] - vx[j] + rounding) >> to_256ths
+        rvy = (vy[i] - vy[j] + rounding) >> to_256ths
+        along = dx * rvx + dy * rvy
+        if along >= 0:
+            return
 
-        self.motion = t * v_mag * math.sin(beta) + other.motion
-        other.motion = n * v_mag * math.cos(beta) + other.motion
+        # Ball i keeps the part of the relative motion across the line, so
+        # the part along it moves from i to j. Moving the same amount keeps
+        # the total motion exact, however the amount is rounded.
+        half = distance >> 1
+        along_x = (dx * along + half) // distance << to_256ths
+        along_y = (dy * along + half) // distance << to_256ths
+        vx[i] -= along_x
+        vy[i] -= along_y
+        vx[j] += along_x
+        vy[j] += along_y
 
     def render(self, i75: I75, colour: Optional[picographics.Pen] = None):
-        i75.display.set_pen(self.colour if colour is None else colour)
-        i75.display.circle(round(self.centre.x),
-                           round(self.centre.y),
-                           self.size)
-
-    def resize(self):
-        if random.random() > 0.2:
-            return True
-        if self.growing:
-            self.size += 1
-            self.motion *= 0.9
-            if self.size >= 6:
-                self.growing = False
-        else:
-            self.size -= 1
-            self.motion *= 1.1
-        return self.size > 1
-
-
-def coordinate_rotation(v: Vector, phi: float) -> Vector:
-    cos_phi = math.cos(phi)
-    sin_phi = math.sin(phi)
-    rotation = Matrix()
-    rotation.values[0][0] = cos_phi
-    rotation.values[0][1] = -sin_phi
-    rotation.values[1][0] = sin_phi
-    rotation.values[1][1] = cos_phi
-
-    return rotation.dot(v)
-
-
-def angle(v2: Vector, v1: Vector) -> float:
-    ang = math.atan2(v2.y, v2.x) - math.atan2(v1.y, v1.x)
-
-    if ang < 0:
-        return 2 * math.pi + ang
-
-    return ang
-
-
-def from_hsv(h, s, v):
-    i = math.floor(h * 6.0)
-    f = h * 6.0 - i
-    v *= 255.0
-    p = v * (1.0 - s)
-    q = v * (1.0 - f * s)
-    t = v * (1.0 - (1.0 - f) * s)
-
-    i = int(i) % 6
-    if i == 0:
-        return int(v), int(t), int(p)
-    if i == 1:
-        return int(q), int(v), int(p)
-    if i == 2:
-        return int(p), int(v), int(t)
-    if i == 3:
-        return int(p), int(q), int(v)
-    if i == 4:
-        return int(t), int(p), int(v)
-    if i == 5:
-        return int(v), int(p), int(q)
-
-
-def generate_ball(i75: I75, size: int, v: Vector) -> Ball:
-    return Ball(i75, v, size, Vector(random.random() * 8,
-                                     random.random() * 8))
+        display = i75.display
+        x, y, size = self.x, self.y, self.size
+        fraction = self.FRACTION
+        half = 1 << (fraction - 1)
+        if colour is not None:
+            display.set_pen(colour)
+        for i in range(self.count):
+            if colour is None:
+                display.set_pen(self.colour[i])
+            display.circle((x[i] + half) >> fraction,
+                           (y[i] + half) >> fraction,
+                           size[i])
+
+    def scale_motion(self, i: int, tenths: int) -> None:
+        self.vx[i] = self.vx[i] * tenths // 10
+        self.vy[i] = self.vy[i] * tenths // 10
+
+
+def generate_ball(i75: I75, balls: Balls, size: int, x: float, y: float):
+    balls.add(x,
+              y,
+              size,
+              random.random() * 8,
+              random.random() * 8,
+              HUE_WHEEL.random(i75))
 
 
 class BouncingBalls:
-    def __init__(self, i75: I75) -> None:
+    """
+    Balls bouncing around the panel, and off each other, growing and
+    shrinking as they go. In busy mode the panel is kept full of small
+    balls. The physics is done with integers, by FixedBalls, unless fixed
+    is false.
+    """
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 busy: bool = False,
+                 fixed: bool = True) -> None:
         self.black = i75.display.create_pen(0, 0, 0)
 
-        self.balls = [generate_ball(i75, 1, Vector(10, 20)),
-                      generate_ball(i75, 3, Vector(20, 10)),
-                      generate_ball(i75, 5, Vector(40, 10))]
+        engine = FixedBalls if fixed else Balls
+        self.busy = busy
+        if busy:
+            self.balls = engine(BUSY_BALLS, BUSY_SIZE)
+            self.add_balls(i75, BUSY_BALLS)
+        else:
+            self.balls = engine(MAX_BALLS)
+            generate_ball(i75, self.balls, 1, 10, 20)
+            generate_ball(i75, self.balls, 3, 20, 10)
+            generate_ball(i75, self.balls, 5, 40, 10)
 
         self.fixed_update_time = 100
         self.frame_time = 0
@@ -208,36 +397,45 @@ class BouncingBalls:
         if self.frame_time < self.fixed_update_time:
             return False
 
-        while self.frame_time > self.fixed_update_time:
-            for ball in self.balls:
-                ball.render(i75, self.black)
-                ball.update(self.fixed_update_time)
-
-            for i in range(len(self.balls) - 1):
-                for j in range(i+1, len(self.balls)):
-                    self.balls[i].collide(self.balls[j])
+        balls = self.balls
+        while self.frame_time >= self.fixed_update_time:
+            balls.render(i75, self.black)
+            balls.update(self.fixed_update_time)
+            balls.collide_all()
 
             self.frame_time -= self.fixed_update_time
 
-        for ball in self.balls:
-            ball.render(i75)
+        balls.render(i75)
 
         while self.new_balls_time > 5000:
-            [b.render(i75, self.black) for b in self.balls]
-            self.balls = [b for b in self.balls if b.resize()]
-
-            if len(self.balls) < 5 and random.random() < 0.2:
-                self.balls.append(
-                    generate_ball(i75,
-                                  2,
-                                  Vector(int(random.random() * 59) + 5,
-                                         int(random.random() * 59) + 5)))
-            [b.render(i75) for b in self.balls]
+            balls.render(i75, self.black)
+            balls.resize()
+
+            if self.busy:
+                self.add_balls(i75, balls.capacity - balls.count)
+            elif balls.count < MAX_BALLS and random.random() < 0.2:
+                self.add_balls(i75, 1)
+            balls.render(i75)
             self.new_balls_time -= 5000
 
         i75.display.update()
 
         return self.total_time >= 30000
 
+    def add_balls(self, i75: I75, count: int) -> None:
+        for _ in range(count):
+            generate_ball(i75,
+                          self.balls,
+                          1 if self.busy else 2,
+                          int(random.random() * 59) + 5,
+                          int(random.random() * 59) + 5)
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        return min(self.fixed_update_time - self.frame_time,
+                   self.time_left())
+
     def reset_timer(self) -> None:
         self.total_time = 0
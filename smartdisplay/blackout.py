@@ -17,11 +17,19 @@
 
 from i75 import I75
 
+from .backend import Backend
+
 
 class Blackout:
-    def __init__(self) -> None:
+    def __init__(self, i75: I75, backend: Backend, image: bytearray) -> None:
         self.total_time = 0
 
+    def time_left(self) -> int:
+        return 60000 - self.total_time
+
+    def next_frame(self) -> int:
+        return self.time_left() if self.total_time > 0 else 0
+
     def render(self, i75: I75, frame_time: int) -> bool:
         i75.display.update()
 
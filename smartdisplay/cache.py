@@ -0,0 +1,86 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import os
+import time
+try:
+    from typing import Any, Dict, Optional
+except ImportError:
+    pass
+
+
+class DataCache:
+    """
+    Keeps the last good data for each screen on flash, so it can be shown
+    when the backend is slow or can't be reached.
+
+    To spare the flash, an entry is only rewritten once it is older than
+    min_write_interval seconds, and entries older than max_age seconds are
+    ignored.
+    """
+    def __init__(self,
+                 directory: str = "cache",
+                 min_write_interval: int = 600,
+                 max_age: int = 24 * 60 * 60) -> None:
+        self.directory = directory
+        self.min_write_interval = min_write_interval
+        self.max_age = max_age
+        self._written: Dict[str, int] = {}
+
+        try:
+            os.mkdir(directory)
+        except OSError:
+            # It already exists.
+            pass
+
+    def store(self, name: str, data: Any) -> None:
+        """Save data as the latest for the named screen."""
+        now = _now()
+        if now - self._written.get(name, -self.min_write_interval) \
+                < self.min_write_interval:
+            return
+        if hasattr(data, "to_json"):
+            data = data.to_json()
+        try:
+            with open(self._path(name), "w") as fp:
+                json.dump([now, data], fp)
+        except OSError as e:
+            print("Failed to cache", name, e)
+            return
+        self._written[name] = now
+
+    def load(self, name: str) -> Optional[Any]:
+        """
+        Returns the last data saved for the named screen, or None if there
+        isn't any that is recent enough.
+        """
+        try:
+            with open(self._path(name), "r") as fp:
+                timestamp, data = json.load(fp)
+        except (OSError, ValueError):
+            return None
+        if _now() - timestamp > self.max_age:
+            return None
+        return data
+
+    def _path(self, name: str) -> str:
+        return f"{self.directory}/{name}.json"
+
+
+def _now() -> int:
+    return time.time_ns() // 1000000000
@@ -15,104 +15,95 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import random
 try:
-    from typing import List, Optional, Tuple, cast
+    from typing import cast
 except ImportError:
     def cast(_, y):  # type:ignore
         return y
 
-from i75 import Date, Colour, I75, Image, render_text, text_boundingbox
+from i75 import Date, I75, Image, render_text
 from i75.image import SingleColourImage
 
-from .single_bit_buffer import SingleBitBuffer
+from .backend import Backend
+from .compositor import Compositor
+from .snow import SnowField
+from .sprite import Sprite
+from .text_metrics import text_boundingbox, warm
 
 FONT = "cg_pixel_3x5_5"
 
+warm(FONT, ("christmas", ))
+warm(FONT, ("happy", "year", "merry"), scale=2)
+warm(FONT, ("new", ), scale=3)
+
+# The snowflake images that fall in front of the text, as (count, slowest,
+# fastest) with speeds in milliseconds a pixel.
+FLAKES = (8, 50, 300)
+
+# Single pixel snow that falls behind the text, furthest first, with the
+# colour of each depth.
+SNOW = ((120, 250, 500), (60, 120, 300))
+SNOW_COLOURS = ((70, 70, 90), (150, 150, 170))
 
-class Snowflake:
-    def __init__(self, colour: Colour, image: SingleColourImage) -> None:
-        self.pos = (random.randint(10, 55), random.randint(0, 60))
-        self.move_to: Optional[Tuple[int, int]] = None
-        self.colour = colour
-        self.image = image
-
-        self._dir = 1 if random.randint(0, 1) == 1 else -1
-        self._bounce = random.randint(3, 10)
-        self._delay = 0
-        self._speed = random.randint(50, 300)
-
-    def update(self,
-               frame_time: int) -> None:
-        self._delay += frame_time
-        if self._delay > self._speed:
-            self._delay -= self._speed
-            self._bounce -= 1
-            if self._bounce < 0:
-                self._dir = -self._dir
-                self._bounce = 10
-
-            self.move_to = self.pos[0] + self._dir, self.pos[1] + 1
-
-            if self.pos[1] > 64:
-                self.move_to = random.randint(10, 55), -self.image.height
-
-    def clean(self, i75: I75, text_buffer: SingleBitBuffer, text_colour: Colour, bg_colour: Colour):
-        if self.move_to is None:
-            return
-        
-        for dx in range(0, self.image.width):
-            for dy in range(0, self.image.height):
-                if self.image._is_pixel(dx, dy):
-                    if text_buffer.is_pixel_set(self.pos[0] + dx, self.pos[1] + dy):
-                        text_colour.set_colour(i75)
-                    else:
-                        bg_colour.set_colour(i75)
-                    i75.display.pixel(self.pos[0] + dx, self.pos[1] + dy)
-
-    def render(self, i75: I75):
-        if self.move_to is not None:
-            self.pos = self.move_to
-            self.move_to = None
-
-        self.colour.set_colour(i75)
-        for dx in range(0, self.image.width):
-            for dy in range(0, self.image.height):
-                if self.image._is_pixel(dx, dy):
-                    i75.display.pixel(self.pos[0] + dx, self.pos[1] + dy)
 
 class Christmas:
-    def __init__(self, i75: I75) -> None:
+    def __init__(self, i75: I75, backend: Backend, image: bytearray) -> None:
         self.total_time = 0
         self.rendered = False
-        self.text_buffer = SingleBitBuffer(64, 64)
-        self.red = Colour.fromrgb(255, 50, 50)
-        self.white = Colour.fromrgb(255, 255, 255)
-        self.black = Colour.fromrgb(0, 0, 0)
-        snowflake_image = cast(SingleColourImage, Image.load(open("images/snowflake.i75", "rb")))
-        self.snowflakes: List[Snowflake] = []
-        for _ in range(8):
-            self.snowflakes.append(Snowflake(self.white, snowflake_image))
+        self.red = i75.display.create_pen(255, 50, 50)
+        self.white = i75.display.create_pen(255, 255, 255)
+        self.black = i75.display.create_pen(0, 0, 0)
+
+        # The snow and text are drawn into masks, so the snowflakes can
+        # fall over them.
+        self.compositor = Compositor(64, 64, self.black)
+        self.snow = SnowField(64, 64, SNOW)
+        self.snow_masks = [
+            self.compositor.add_layer(i75.display.create_pen(*colour))
+            for colour in SNOW_COLOURS]
+        self.snow.set_pixels(self.snow_masks)
+        self.text_buffer = self.compositor.add_layer(self.red)
+
+        with open("images/snowflake.i75", "rb") as fp:
+            snowflake = Sprite.from_image(cast(SingleColourImage,
+                                               Image.load(fp)))
+        self.flakes = SnowField(64, 64, (FLAKES, ), size=snowflake.height)
+        for i in range(self.flakes.count):
+            self.compositor.add_sprite(snowflake,
+                                       self.flakes.x[i],
+                                       self.flakes.y[i],
+                                       self.white)
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        if not self.rendered:
+            return 0
+        return min(self.flakes.next_update(),
+                   self.snow.next_update(),
+                   self.time_left())
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
 
         if self.rendered:
+            if self.snow.update(frame_time) > 0:
+                self.snow.draw(i75, self.compositor, self.snow_masks)
+
+            flakes = self.flakes
+            if flakes.update(frame_time) > 0:
+                for i in range(flakes.count):
+                    if flakes.moved[i]:
+                        self.compositor.move(i, flakes.x[i], flakes.y[i])
+            self.compositor.update(i75)
 
-            for snowflake in self.snowflakes:
-                snowflake.update(frame_time)
-                snowflake.clean(i75, self.text_buffer, self.red, self.black)
-            for snowflake in self.snowflakes:
-                snowflake.render(i75)
-        
             i75.display.update()
 
-            return self.total_time > 30000
+            return self.total_time >= 30000
 
         self.rendered = True
 
-        self.red.set_colour(i75)
-
         today = i75.now().date()
         christmas = Date(today.year, 12, 25)
 
@@ -167,21 +158,18 @@ class Christmas:
             sleeps_offset_x = 32 - int(width / 2)
             self.render_text_to_buffer(i75, sleeps_offset_x, y, "christmas")
 
-        for snowflake in self.snowflakes:
-            snowflake.render(i75)
+        self.compositor.render(i75)
 
         i75.display.update()
 
         return False
 
-    def render_text_to_buffer(self, i75: I75, x: int, y: int, text: str, scale: int=1) -> None:
-        render_text(i75.display,
-                    FONT,
-                    x,
-                    y,
-                    text,
-                    scale=scale)
-        
+    def render_text_to_buffer(self,
+                              i75: I75,
+                              x: int,
+                              y: int,
+                              text: str,
+                              scale: int = 1) -> None:
         render_text(self.text_buffer,
                     FONT,
                     x,
@@ -15,9 +15,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import math
+from array import array
 try:
-    from typing import Tuple
+    from typing import Any, List, Tuple
 except ImportError:
     pass
 import sys
@@ -27,79 +27,158 @@ import picographics
 from i75 import DateTime, I75
 from i75.tz import EuropeLondon
 
+from .backend import Backend
+from .single_bit_buffer import SingleBitBuffer
+from .utils import draw_line
+
 HOUR_LENGTH = 25
 MINUTE_LENGTH = 30
 SECOND_LENGTH = 30
+TICK_LENGTH = 3
+
+# The positions around the clock that a hand can point to. This gives the
+# second hand one for each 50ms.
+HAND_POSITIONS = 1200
+
+QUARTER = HAND_POSITIONS // 4
+
+# round(sin(2 * pi * i / HAND_POSITIONS) * 2 ** 16) for the first quarter
+# turn. These are worked out once rather than on the device, so the hands
+# are the same whatever precision its floats have.
+QUARTER_SINE = array("i", (
+    0, 343, 686, 1029, 1372, 1716, 2059, 2401, 2744, 3087, 3430, 3773,
+    4115, 4457, 4800, 5142, 5484, 5826, 6167, 6509, 6850, 7192, 7533, 7873,
+    8214, 8554, 8894, 9234, 9574, 9913, 10252, 10591, 10929, 11268, 11605,
+    11943, 12280, 12617, 12954, 13290, 13626, 13961, 14296, 14631, 14965,
+    15299, 15633, 15966, 16298, 16630, 16962, 17293, 17624, 17954, 18284,
+    18613, 18942, 19270, 19598, 19925, 20252, 20578, 20903, 21228, 21553,
+    21876, 22200, 22522, 22844, 23165, 23486, 23806, 24125, 24444, 24762,
+    25080, 25396, 25712, 26027, 26342, 26656, 26969, 27281, 27593, 27904,
+    28214, 28523, 28832, 29140, 29447, 29753, 30058, 30363, 30666, 30969,
+    31271, 31572, 31872, 32172, 32470, 32768, 33065, 33361, 33655, 33949,
+    34242, 34535, 34826, 35116, 35405, 35693, 35981, 36267, 36552, 36837,
+    37120, 37402, 37684, 37964, 38243, 38521, 38798, 39074, 39349, 39623,
+    39896, 40167, 40438, 40708, 40976, 41243, 41509, 41774, 42038, 42301,
+    42562, 42823, 43082, 43340, 43597, 43852, 44107, 44360, 44612, 44862,
+    45112, 45360, 45607, 45853, 46098, 46341, 46583, 46824, 47063, 47301,
+    47538, 47774, 48008, 48241, 48472, 48703, 48932, 49159, 49386, 49610,
+    49834, 50056, 50277, 50496, 50714, 50931, 51146, 51360, 51573, 51784,
+    51993, 52201, 52408, 52613, 52817, 53020, 53221, 53420, 53618, 53815,
+    54010, 54204, 54396, 54586, 54775, 54963, 55149, 55334, 55517, 55699,
+    55879, 56057, 56234, 56410, 56583, 56756, 56927, 57096, 57264, 57430,
+    57594, 57757, 57918, 58078, 58236, 58393, 58548, 58701, 58853, 59003,
+    59152, 59299, 59444, 59588, 59730, 59870, 60009, 60146, 60281, 60415,
+    60547, 60678, 60807, 60934, 61059, 61183, 61305, 61426, 61544, 61662,
+    61777, 61891, 62003, 62113, 62222, 62328, 62434, 62537, 62639, 62739,
+    62837, 62934, 63029, 63122, 63213, 63303, 63391, 63477, 63562, 63644,
+    63725, 63804, 63882, 63958, 64032, 64104, 64174, 64243, 64310, 64375,
+    64439, 64500, 64560, 64618, 64675, 64729, 64782, 64833, 64882, 64930,
+    64975, 65019, 65061, 65102, 65140, 65177, 65212, 65245, 65277, 65306,
+    65334, 65360, 65384, 65407, 65427, 65446, 65463, 65479, 65492, 65504,
+    65514, 65522, 65528, 65532, 65535, 65536,
+))
+
+
+def sine(position: int) -> int:
+    """Returns the sine of a hand position, times 2 ** 16."""
+    position %= HAND_POSITIONS
+    if position <= QUARTER:
+        return QUARTER_SINE[position]
+    if position <= 2 * QUARTER:
+        return QUARTER_SINE[2 * QUARTER - position]
+    if position <= 3 * QUARTER:
+        return -QUARTER_SINE[position - 2 * QUARTER]
+    return -QUARTER_SINE[HAND_POSITIONS - position]
+
+
+def hand_table(length: int) -> Tuple[array, array]:
+    """
+    Returns the offsets from the centre of the end of a hand, at each
+    position.
+    """
+    xs = array("b", bytes(HAND_POSITIONS))
+    ys = array("b", bytes(HAND_POSITIONS))
+    for position in range(HAND_POSITIONS):
+        # Shifting rounds down, like math.floor.
+        xs[position] = (length * sine(position)) >> 16
+        ys[position] = (length * -sine(position + QUARTER)) >> 16
+    return xs, ys
 
 
-def get_center_point(angle) -> Tuple[int, int]:
-    if angle < math.pi / 2:
+SECOND_HAND = hand_table(SECOND_LENGTH)
+MINUTE_HAND = SECOND_HAND if MINUTE_LENGTH == SECOND_LENGTH \
+    else hand_table(MINUTE_LENGTH)
+HOUR_HAND = hand_table(HOUR_LENGTH)
+
+
+def center_point(position: int) -> Tuple[int, int]:
+    """
+    Returns the pixel a hand at position starts from, as the middle of the
+    panel falls between four pixels.
+    """
+    if position < QUARTER:
         return (32, 31)
-    if angle < math.pi:
+    if position < 2 * QUARTER:
         return (32, 32)
-    if angle < 2 * math.pi / 3:
-        return (31, 32)
     return (31, 31)
 
 
-# This currently has issues due to the i75 working in single precision
-# floats, and Python3 using doubles.
-def render_clock_face(i75: I75) -> None:
+def render_clock_face(face: SingleBitBuffer) -> None:
+    """Draws the tick marks into face."""
     for tick in range(12):
-        tick_len = 3 if tick in (0, 3, 6, 9) else 3
-        angle = 2 * math.pi * tick / 12.0
-        cx, cy = get_center_point(angle)
-        x1 = math.floor((31 - tick_len) * math.cos(angle) + cx)
-        y1 = math.floor((31 - tick_len) * math.sin(angle) + cy)
-        x2 = math.floor(31 * math.cos(angle) + cx)
-        y2 = math.floor(31 * math.sin(angle) + cy)
-
-        i75.display.line(x1, y1, x2, y2)
-
-    i75.display.line(32, 3, 32, 0)
-    i75.display.line(31, 60, 31, 63)
-    i75.display.line(0, 31, 3, 31)
-    i75.display.line(60, 32, 63, 32)
-
-
-def render_hand(i75: I75, length: int, percent: float) -> None:
-    angle = 2 * math.pi * percent
-    cx, cy = get_center_point(angle)
-    i75.display.line(cx,
-                     cy,
-                     math.floor(length * math.sin(angle) + cx),
-                     math.floor(length * -math.cos(angle) + cy))
-
-
-def render_clock(i75: I75,
-                 white: picographics.Pen,
-                 red: picographics.Pen,
-                 now: DateTime,
-                 subsecond: int,
-                 display_ticks: bool = True) -> None:
-    if display_ticks:
-        i75.display.set_pen(white)
-        render_clock_face(i75)
-
-    i75.display.set_pen(red)
-
-    part_second = subsecond / 1000.0
-    render_hand(i75, SECOND_LENGTH, (now.second + part_second) / 60.0)
-
-    i75.display.set_pen(white)
-
-    minute_percent = (now.minute * 60
-                      + now.second
-                      + part_second) / (60.0 * 60)
-    hour_percent = ((now.hour % 12) * (60 * 60)
-                    + now.minute * 60
-                    + now.second + part_second) / (60.0 * 60 * 12)
-    render_hand(i75, MINUTE_LENGTH, minute_percent)
-    render_hand(i75, HOUR_LENGTH, hour_percent)
+        position = tick * HAND_POSITIONS // 12
+        cx, cy = center_point(position)
+        cos, sin = sine(position + QUARTER), sine(position)
+        draw_line(face.pixel,
+                  cx + (((31 - TICK_LENGTH) * cos) >> 16),
+                  cy + (((31 - TICK_LENGTH) * sin) >> 16),
+                  cx + ((31 * cos) >> 16),
+                  cy + ((31 * sin) >> 16))
+
+    draw_line(face.pixel, 32, 3, 32, 0)
+    draw_line(face.pixel, 31, 60, 31, 63)
+    draw_line(face.pixel, 0, 31, 3, 31)
+    draw_line(face.pixel, 60, 32, 63, 32)
+
+
+# The face never changes, so it is drawn once, and hands are erased by
+# putting back the pixels of the face that they covered.
+FACE = SingleBitBuffer(64, 64)
+render_clock_face(FACE)
+
+
+def hand_line(hand: Tuple[array, array],
+              position: int) -> Tuple[int, int, int, int]:
+    """Returns the ends of a hand at position."""
+    cx, cy = center_point(position)
+    return (cx, cy, cx + hand[0][position], cy + hand[1][position])
+
+
+def overlaps(a: Tuple[int, int, int, int],
+             b: Tuple[int, int, int, int]) -> bool:
+    """Returns true if the rectangles around two lines overlap."""
+    return min(a[0], a[2]) <= max(b[0], b[2]) \
+        and min(b[0], b[2]) <= max(a[0], a[2]) \
+        and min(a[1], a[3]) <= max(b[1], b[3]) \
+        and min(b[1], b[3]) <= max(a[1], a[3])
+
+
+def hand_positions(now: DateTime, subsecond: int) -> Tuple[int, int, int]:
+    """Returns the positions of the second, minute and hour hands."""
+    seconds = now.minute * 60 + now.second
+    return ((now.second * 1000 + subsecond)
+            * HAND_POSITIONS // (60 * 1000),
+            seconds * HAND_POSITIONS // (60 * 60),
+            (seconds + (now.hour % 12) * 60 * 60)
+            * HAND_POSITIONS // (60 * 60 * 12))
+
+
+# The hands, in the order they are drawn.
+HANDS = (SECOND_HAND, MINUTE_HAND, HOUR_HAND)
 
 
 class Clock:
-    def __init__(self, i75: I75) -> None:
+    def __init__(self, i75: I75, backend: Backend, image: bytearray) -> None:
         self.white = i75.display.create_pen(255, 255, 255)
         self.red = i75.display.create_pen(255, 0, 0)
         self.black = i75.display.create_pen(0, 0, 0)
@@ -109,6 +188,18 @@ class Clock:
         self.old_subsecond = 0
         self.base_ticks = 0
 
+        # The lines of the hands on the panel, once the face is drawn.
+        self.lines: List[Tuple[int, int, int, int]] = []
+
+        self._display: Any = i75.display
+        self._face_pen = False
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        return 50
+
     def render(self, i75: I75, frame_time: int) -> bool:
         now = EuropeLondon.to_localtime(i75.now())
         subsecond = i75.ticks_diff(i75.ticks_ms(), self.base_ticks) % 1000
@@ -120,17 +211,7 @@ class Clock:
             self.base_ticks += 25
             subsecond = 999
 
-        render_clock(i75,
-                     self.black,
-                     self.black,
-                     self.old_time,
-                     self.old_subsecond,
-                     False)
-        render_clock(i75,
-                     self.white,
-                     self.red,
-                     now,
-                     subsecond)
+        self.render_hands(i75, now, subsecond)
 
         self.old_time = now
         self.old_subsecond = subsecond
@@ -139,3 +220,56 @@ class Clock:
 
         self.total_time += frame_time
         return self.total_time >= 30000
+
+    def render_hands(self, i75: I75, now: DateTime, subsecond: int) -> None:
+        """Moves the hands to now, drawing the face first if needed."""
+        lines = [hand_line(hand, position)
+                 for hand, position in zip(HANDS,
+                                           hand_positions(now, subsecond))]
+        if not self.lines:
+            self.render_face(i75)
+            redraw = [True, True, True]
+        else:
+            redraw = self.erase_hands(i75, lines)
+
+        # A hand is also drawn again if one drawn before it crossed it, so
+        # it stays on top.
+        pens = (self.red, self.white, self.white)
+        drawn: List[Tuple[int, int, int, int]] = []
+        for hand in range(len(HANDS)):
+            if redraw[hand] \
+               or any(overlaps(lines[hand], line) for line in drawn):
+                i75.display.set_pen(pens[hand])
+                draw_line(i75.display.pixel, *lines[hand])
+                drawn.append(lines[hand])
+        self.lines = lines
+
+    def render_face(self, i75: I75) -> None:
+        FACE.blit(i75, self.white)
+
+    def erase_hands(self,
+                    i75: I75,
+                    lines: List[Tuple[int, int, int, int]]) -> List[bool]:
+        """
+        Erases the hands that have moved, and returns which hands need
+        drawing again: those that moved, and those that an erased hand
+        may have crossed.
+        """
+        self._display = i75.display
+        self._face_pen = False
+        i75.display.set_pen(self.black)
+
+        erased = [old for old, new in zip(self.lines, lines) if old != new]
+        for old in erased:
+            draw_line(self._restore, *old)
+
+        return [old != new or any(overlaps(new, line) for line in erased)
+                for old, new in zip(self.lines, lines)]
+
+    def _restore(self, x: int, y: int) -> None:
+        """Puts back the pixel of the face at (x, y)."""
+        face_pen = FACE.is_pixel_set(x, y)
+        if face_pen != self._face_pen:
+            self._display.set_pen(self.white if face_pen else self.black)
+            self._face_pen = face_pen
+        self._display.pixel(x, y)
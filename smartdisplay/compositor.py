@@ -0,0 +1,217 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    from typing import Any, List, Optional, Tuple
+except ImportError:
+    pass
+
+from i75 import I75
+
+from .damage import unwrap
+from .single_bit_buffer import SingleBitBuffer
+from .sprite import Sprite
+from .utils import blit
+
+
+class Placed:
+    """A sprite on the panel, where it is to go, and where it was drawn."""
+    __slots__ = ("sprite", "x", "y", "pen", "drawn_x", "drawn_y")
+
+    def __init__(self, sprite: Sprite, x: int, y: int, pen: Any) -> None:
+        self.sprite = sprite
+        self.x = x
+        self.y = y
+        self.pen = pen
+        self.drawn_x: Optional[int] = None
+        self.drawn_y = 0
+
+
+class Compositor:
+    """
+    Builds a screen from layers: a background of one pen or an RGB888
+    image, then any number of masks, each drawn in one pen, and sprites
+    on top.
+
+    The layers are drawn once, by :func:`render`. After that, sprites are
+    moved with :func:`move` and :func:`update` draws the change: each
+    sprite that moved is erased by putting back the pixels of the layers
+    under it, and sprites are only drawn again if they moved, or might
+    have been erased by one that did. A pixel of a layer that changes is
+    drawn again with :func:`repaint`.
+    """
+    def __init__(self,
+                 width: int,
+                 height: int,
+                 background: Any,
+                 image: Optional[Any] = None) -> None:
+        self.width = width
+        self.height = height
+        self.background = background
+        self.image = image
+        # Top first, which is the order pixels are looked up in.
+        self.layers: List[Tuple[SingleBitBuffer, Any]] = []
+        self.sprites: List[Placed] = []
+        # The pixels repainted since the last update, which sprites over
+        # them need drawing again to cover.
+        self.repainted = SingleBitBuffer(width, height)
+        self._any_repainted = False
+
+    def add_layer(self, pen: Any) -> SingleBitBuffer:
+        """
+        Adds a layer above the others, and returns its mask to draw into,
+        such as with render_text. Set pixels are shown in pen.
+        """
+        mask = SingleBitBuffer(self.width, self.height)
+        self.layers.insert(0, (mask, pen))
+        return mask
+
+    def add_sprite(self, sprite: Sprite, x: int, y: int, pen: Any) -> int:
+        """
+        Adds a sprite above those already added, and returns the number
+        to move it by.
+        """
+        self.sprites.append(Placed(sprite, x, y, pen))
+        return len(self.sprites) - 1
+
+    def move(self, number: int, x: int, y: int) -> None:
+        placed = self.sprites[number]
+        placed.x, placed.y = x, y
+
+    def pen_at(self, i75: I75, x: int, y: int) -> Any:
+        """Returns the pen the layers show at (x, y), ignoring sprites."""
+        for mask, pen in self.layers:
+            if mask.is_pixel_set(x, y):
+                return pen
+        image = self.image
+        if image is None:
+            return self.background
+        i = (y * self.width + x) * 3
+        return i75.display.create_pen(image[i], image[i + 1], image[i + 2])
+
+    def repaint(self, i75: I75, x: int, y: int) -> None:
+        """
+        Draws the pixel at (x, y) again, after a layer has changed there.
+        Sprites over it are drawn again by the next update.
+        """
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return
+        i75.display.set_pen(self.pen_at(i75, x, y))
+        i75.display.pixel(x, y)
+        self.repainted.pixel(x, y)
+        self._any_repainted = True
+
+    def render(self, i75: I75) -> None:
+        """Draws every layer, and the sprites."""
+        if self.image is None:
+            i75.display.set_pen(self.background)
+            i75.display.clear()
+        else:
+            blit(i75, self.image, 0, 0, self.width, self.height)
+        for mask, pen in reversed(self.layers):
+            mask.blit(i75, pen)
+        for placed in self.sprites:
+            self._draw(i75, placed)
+
+    def update(self, i75: I75) -> None:
+        """Draws the sprites that have moved since the last update."""
+        erased = []
+        for placed in self.sprites:
+            if placed.drawn_x is not None \
+               and (placed.x != placed.drawn_x or placed.y != placed.drawn_y):
+                self._restore(i75, placed)
+                erased.append(placed)
+
+        # Draw a sprite again if it moved, if a sprite that was erased
+        # might have covered it, or if one drawn below it might cover it.
+        drawn: List[Placed] = []
+        for placed in self.sprites:
+            if placed.x != placed.drawn_x or placed.y != placed.drawn_y \
+               or any(self._overlaps(placed, other) for other in erased) \
+               or any(self._overlaps(placed, other) for other in drawn) \
+               or (self._any_repainted and self._on_repainted(placed)):
+                self._draw(i75, placed)
+                drawn.append(placed)
+
+        if self._any_repainted:
+            self.repainted.reset()
+            self._any_repainted = False
+
+    def _draw(self, i75: I75, placed: Placed) -> None:
+        placed.sprite.draw(i75, placed.x, placed.y, placed.pen)
+        placed.drawn_x, placed.drawn_y = placed.x, placed.y
+
+    def _overlaps(self, placed: Placed, other: Placed) -> bool:
+        """
+        Returns true if placed, where it is now, overlaps other, where it
+        was drawn before, or is now if it was drawn this update.
+        """
+        x = other.drawn_x if other.drawn_x is not None else other.x
+        y = other.drawn_y
+        return placed.x < x + other.sprite.width \
+            and x < placed.x + placed.sprite.width \
+            and placed.y < y + other.sprite.height \
+            and y < placed.y + placed.sprite.height
+
+    def _on_repainted(self, placed: Placed) -> bool:
+        """Returns true if a pixel under placed was repainted."""
+        x, width = placed.x, placed.sprite.width
+        for y in range(placed.y, placed.y + placed.sprite.height):
+            if self.repainted.is_span_set(x, x + width, y):
+                return True
+        return False
+
+    def _restore(self, i75: I75, placed: Placed) -> None:
+        """Puts back the layers under where placed was drawn."""
+        sprite = placed.sprite
+        x, y = placed.drawn_x or 0, placed.drawn_y
+        display = unwrap(i75.display,
+                         x, y, x + sprite.width, y + sprite.height)
+
+        width, height = self.width, self.height
+        layers, image = self.layers, self.image
+        offsets = sprite.offsets
+        current = None
+        last_colour = -1
+        image_pen = None
+        for i in range(0, len(offsets), 2):
+            px, py = x + offsets[i], y + offsets[i + 1]
+            if px < 0 or py < 0 or px >= width or py >= height:
+                continue
+
+            pen = None
+            for mask, layer_pen in layers:
+                if mask.is_pixel_set(px, py):
+                    pen = layer_pen
+                    break
+            if pen is None:
+                if image is None:
+                    pen = self.background
+                else:
+                    j = (py * width + px) * 3
+                    colour = image[j] << 16 | image[j + 1] << 8 | image[j + 2]
+                    if colour != last_colour:
+                        image_pen = display.create_pen(image[j],
+                                                       image[j + 1],
+                                                       image[j + 2])
+                        last_colour = colour
+                    pen = image_pen
+
+            if pen is not current:
+                display.set_pen(pen)
+                current = pen
+            display.pixel(px, py)
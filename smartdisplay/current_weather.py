@@ -17,14 +17,16 @@
 
 import math
 try:
-    from typing import Tuple
+    from typing import Any, Tuple
 except ImportError:
     pass
-import urequests
 
-from i75 import I75, Image, render_text, text_boundingbox
+from i75 import I75, Image, render_text
 
-from .utils import render_image_with_fade
+from .backend import Backend
+from .packed import PackedData
+from .text_metrics import text_boundingbox, warm
+from .utils import render_image_with_fade, render_stale_marker
 
 FONT = "cg_pixel_3x5_5"
 
@@ -32,24 +34,71 @@ TITLE = "Weather"
 
 MPH = 2.23694
 
+warm(FONT, (TITLE, "Rain: ", "Gust: ", "Avg: ", "UV: ", "24h:", "1h:"))
+
+
+class WeatherData(PackedData):
+    __slots__ = ("temperature", "humidity", "rain_20m", "rain_1h", "rain_24h",
+                 "lux", "uv", "wind", "gust", "pressure", "winddir",
+                 "pressure_change", "pressure_text")
+
+    TYPE = "application/x-smartdisplay-weather;v=1"
+    FORMAT = "<10f4s12s16s"
+
+    temperature: float
+    humidity: float
+    rain_20m: float
+    rain_1h: float
+    rain_24h: float
+    lux: float
+    uv: float
+    wind: float
+    gust: float
+    pressure: float
+    winddir: str
+    pressure_change: str
+    pressure_text: str
+
 
 class CurrentWeather:
-    def __init__(self, backend: str, image: bytearray) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 data: Any = None) -> None:
         self.rendered = False
         self.total_time = 0
+        self.stale = False
         self.image = image
 
-        r = urequests.get(f"http://{backend}:6001/current_weather", timeout=10)
-        try:
-            self.data = r.json()
-        finally:
-            r.close()
+        if data is None:
+            data = CurrentWeather.fetch(i75, backend, image)
+        elif isinstance(data, dict):
+            # Cached data is always JSON.
+            data = WeatherData.from_json(data)
+        self.data = data
+
+    @staticmethod
+    def fetch(i75: I75, backend: Backend, image: bytearray) -> WeatherData:
+        return backend.get_json("/current_weather",
+                                WeatherData.TYPE,
+                                WeatherData.unpack,
+                                WeatherData.from_json)
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        return self.time_left() if self.rendered else 0
+
+    def restart(self) -> None:
+        self.total_time = 0
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
 
         if self.rendered:
-            return self.total_time > 30000
+            return self.total_time >= 30000
 
         white = i75.display.create_pen(255, 255, 255)
         blue = i75.display.create_pen(0, 0, 255)
@@ -59,22 +108,23 @@ class CurrentWeather:
         red = i75.display.create_pen(255, 0, 0)
         violet = i75.display.create_pen(127, 0, 255)
 
-        if self.data['rain_20m'] >= 0.2:
+        if self.data.rain_20m >= 0.2:
             image_file = "images/rainy.i75"
-        elif self.data['temperature'] > 28:
+        elif self.data.temperature > 28:
             image_file = "images/hot.i75"
-        elif self.data['temperature'] < 2:
+        elif self.data.temperature < 2:
             image_file = "images/cold.i75"
-        elif self.data['lux'] < 10:
+        elif self.data.lux < 10:
             image_file = "images/night.i75"
-        elif self.data['lux'] < 2500:
+        elif self.data.lux < 2500:
             image_file = "images/sunrise.i75"
-        elif self.data['lux'] > 50000:
+        elif self.data.lux > 50000:
             image_file = "images/sunny.i75"
         else:
             image_file = "images/cloudy.i75"
 
-        img = Image.load_into_buffer(open(image_file, "rb"), self.image)
+        with open(image_file, "rb") as fp:
+            img = Image.load_into_buffer(fp, self.image)
 
         render_image_with_fade(i75, img, 2, 0.5)
 
@@ -88,12 +138,12 @@ class CurrentWeather:
 
         y = font_height + 4
 
-        i75.display.set_pen(blue if self.data['temperature'] < 2 else
-                            (red if self.data['temperature'] > 28 else
-                            (yellow if self.data['temperature'] > 24
-                             else white)))
+        i75.display.set_pen(blue if self.data.temperature < 2 else
+                            (red if self.data.temperature > 28 else
+                             (yellow if self.data.temperature > 24
+                              else white)))
 
-        temp_str = f"{self.data['temperature']:.1f}"
+        temp_str = f"{self.data.temperature:.1f}"
         temp_width, _ = text_boundingbox(FONT, temp_str)
         render_text(i75.display, FONT, 10, y, temp_str)
         temp_width += 10
@@ -111,7 +161,7 @@ class CurrentWeather:
                     "C")
 
         i75.display.set_pen(white)
-        hum_str = f"{self.data['humidity']:.0f}%"
+        hum_str = f"{self.data.humidity:.0f}%"
         hum_width, _ = text_boundingbox(FONT, hum_str)
         render_text(i75.display, FONT, 54 - hum_width, y, hum_str)
 
@@ -127,9 +177,9 @@ class CurrentWeather:
         rain_24h, _ = text_boundingbox(FONT, "24h:")
         rain_1h, _ = text_boundingbox(FONT, "1h:")
 
-        rain_24h_str = f"{self.data['rain_24h']:.1f}mm"
+        rain_24h_str = f"{self.data.rain_24h:.1f}mm"
         rain_24h_prefix, _ = text_boundingbox(FONT, rain_24h_str.split(".")[0])
-        rain_1h_str = f"{self.data['rain_1h']:.1f}mm"
+        rain_1h_str = f"{self.data.rain_1h:.1f}mm"
         rain_1h_prefix, _ = text_boundingbox(FONT, rain_1h_str.split(".")[0])
 
         rain_dot_max = max(rain_24h_prefix, rain_1h_prefix, 5)
@@ -159,61 +209,64 @@ class CurrentWeather:
 
         y += 1 + font_height
         wind_str = \
-            f"Gust: {self.data['gust']*MPH:.0f}mph  {self.data['winddir']}"
+            f"Gust: {self.data.gust*MPH:.0f}mph  {self.data.winddir}"
         render_text(i75.display, FONT, (max_prefix - gust) + 2, y, wind_str)
 
         y += font_height
-        wind_str = f"Avg: {self.data['wind']*MPH:.0f}mph"
+        wind_str = f"Avg: {self.data.wind*MPH:.0f}mph"
         render_text(i75.display, FONT, (max_prefix - avg) + 2, y, wind_str)
 
         y += 1 + font_height
-        pressure_str = f"{self.data['pressure']:.1f}HPA "
+        pressure_str = f"{self.data.pressure:.1f}HPA "
         pressure, _ = text_boundingbox(FONT, pressure_str)
         pressure_start = math.floor(32 - pressure / 2)
         render_text(i75.display, FONT, pressure_start, y, pressure_str)
 
-        if self.data['pressure_change'] == "increasing":
+        if self.data.pressure_change == "increasing":
             for iy in range(y, y + 5):
                 i75.display.pixel(pressure_start + pressure + 2, iy)
             i75.display.pixel(pressure_start + pressure + 1, y + 1)
             i75.display.pixel(pressure_start + pressure + 3, y + 1)
             i75.display.pixel(pressure_start + pressure, y + 2)
             i75.display.pixel(pressure_start + pressure + 4, y + 2)
-        if self.data['pressure_change'] == "decreasing":
+        if self.data.pressure_change == "decreasing":
             for iy in range(y, y + 5):
                 i75.display.pixel(pressure_start + pressure + 2, iy)
             i75.display.pixel(pressure_start + pressure + 1, iy - 1)
             i75.display.pixel(pressure_start + pressure + 3, iy - 1)
             i75.display.pixel(pressure_start + pressure, iy - 2)
             i75.display.pixel(pressure_start + pressure + 4, iy - 2)
-        if self.data['pressure_change'] == "level":
+        if self.data.pressure_change == "level":
             for ix in range(-2, 2):
                 i75.display.pixel(pressure_start + pressure + 2 + ix, y + 2)
 
         y += font_height
-        pt_width, _ = text_boundingbox(FONT, self.data['pressure_text'])
+        pt_width, _ = text_boundingbox(FONT, self.data.pressure_text)
         render_text(i75.display,
                     FONT,
                     math.floor(32 - pt_width / 2),
                     y,
-                    self.data['pressure_text'])
+                    self.data.pressure_text)
 
         y += 1 + font_height
         render_text(i75.display, FONT, (max_prefix - uvi) + 2, y, "UV:")
 
-        if self.data['uv'] <= 2:
+        if self.data.uv <= 2:
             i75.display.set_pen(green)
-        elif self.data['uv'] <= 5:
+        elif self.data.uv <= 5:
             i75.display.set_pen(yellow)
-        elif self.data['uv'] <= 7:
+        elif self.data.uv <= 7:
             i75.display.set_pen(orange)
-        elif self.data['uv'] <= 10:
+        elif self.data.uv <= 10:
             i75.display.set_pen(red)
         else:
             i75.display.set_pen(violet)
-        uv_str = f"{self.data['uv']:.0f}"
+        uv_str = f"{self.data.uv:.0f}"
         render_text(i75.display, FONT, max_prefix + 2, y, uv_str)
 
+        if self.stale:
+            render_stale_marker(i75)
+
         i75.display.update()
         self.rendered = True
 
@@ -0,0 +1,149 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    from typing import Any
+except ImportError:
+    pass
+
+from i75.graphics import Graphics
+
+
+class DamageTracker(Graphics):
+    """
+    Wraps the display, and records the rectangle drawn to since the last
+    update.
+
+    An update with nothing drawn is skipped. If the display can update just
+    part of the panel, with an update_region method, only the damaged
+    rectangle is sent to it.
+
+    Code that draws a known area pixel by pixel can :func:`unwrap` the
+    display, to mark the area once and draw straight to the display
+    underneath, saving a call per pixel.
+    """
+    def __init__(self, display: Graphics) -> None:
+        self.display = display
+        self.width, self.height = display.get_bounds()
+        self._update_region: Any = getattr(display, "update_region", None)
+
+        self.updates = 0
+        self.skipped = 0
+        self.damaged = 0
+        self.max_damaged = 0
+
+        # The damaged rectangle, which is empty when x1 >= x2.
+        self.x1, self.y1 = self.width, self.height
+        self.x2, self.y2 = 0, 0
+
+    def create_pen(self, r: int, g: int, b: int) -> Any:
+        return self.display.create_pen(r, g, b)
+
+    def set_pen(self, pen: Any) -> None:
+        self.display.set_pen(pen)
+
+    def get_bounds(self) -> Any:
+        return self.display.get_bounds()
+
+    def mark(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        """Marks the rectangle up to, but not including, (x2, y2) damaged."""
+        if x1 < self.x1:
+            self.x1 = x1
+        if y1 < self.y1:
+            self.y1 = y1
+        if x2 > self.x2:
+            self.x2 = x2
+        if y2 > self.y2:
+            self.y2 = y2
+
+    @staticmethod
+    def unwrap(display: Any, x1: int, y1: int, x2: int, y2: int) -> Any:
+        """
+        Returns the display to draw the rectangle up to, but not including,
+        (x2, y2) to. If display is a DamageTracker the rectangle is marked
+        damaged, and the display it wraps is returned.
+        """
+        if isinstance(display, DamageTracker):
+            display.mark(x1, y1, x2, y2)
+            return display.display
+        return display
+
+    def pixel(self, x: int, y: int) -> None:
+        if x < self.x1:
+            self.x1 = x
+        if x >= self.x2:
+            self.x2 = x + 1
+        if y < self.y1:
+            self.y1 = y
+        if y >= self.y2:
+            self.y2 = y + 1
+        self.display.pixel(x, y)
+
+    def line(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        self.mark(min(x1, x2), min(y1, y2), max(x1, x2) + 1, max(y1, y2) + 1)
+        self.display.line(x1, y1, x2, y2)
+
+    def circle(self, cx: int, cy: int, radius: int) -> None:
+        self.mark(cx - radius, cy - radius, cx + radius + 1, cy + radius + 1)
+        self.display.circle(cx, cy, radius)
+
+    def fill(self, tl_x: int, tl_y: int, br_x: int, br_y: int) -> None:
+        self.mark(tl_x, tl_y, br_x, br_y)
+        self.display.fill(tl_x, tl_y, br_x, br_y)
+
+    def clear(self) -> None:
+        self.mark(0, 0, self.width, self.height)
+        self.display.clear()
+
+    def update(self) -> None:
+        x1, y1 = max(self.x1, 0), max(self.y1, 0)
+        x2, y2 = min(self.x2, self.width), min(self.y2, self.height)
+        self._clean()
+        if x2 <= x1 or y2 <= y1:
+            self.skipped += 1
+            return
+
+        area = (x2 - x1) * (y2 - y1)
+        self.updates += 1
+        self.damaged += area
+        if area > self.max_damaged:
+            self.max_damaged = area
+
+        if self._update_region is not None:
+            self._update_region(x1, y1, x2, y2)
+        else:
+            self.display.update()
+
+    def stats(self) -> str:
+        """Describes the updates since the stats were last reset."""
+        average = self.damaged // self.updates if self.updates > 0 else 0
+        return f"{self.updates} updates, {self.skipped} skipped, " \
+            + f"{average} pixels on average, {self.max_damaged} at most"
+
+    def reset_stats(self) -> None:
+        self.updates = 0
+        self.skipped = 0
+        self.damaged = 0
+        self.max_damaged = 0
+
+    def _clean(self) -> None:
+        self.x1, self.y1 = self.width, self.height
+        self.x2, self.y2 = 0, 0
+
+
+# So drawing code can unwrap a display without importing DamageTracker.
+unwrap = DamageTracker.unwrap
@@ -0,0 +1,96 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    from typing import Any, Optional, Tuple
+except ImportError:
+    pass
+
+from i75.graphics import Graphics
+
+from .utils import draw_line
+
+
+class FrameBuffer(Graphics):
+    """
+    An offscreen copy of the panel, held as an RGB888 image row by row,
+    that a screen can draw to in place of the display.
+
+    Pens are created by the display, so they can be kept and used on it
+    later, and are unpacked into red, green and blue when set. On the
+    device these are RGB888 pens, which are the colour packed into an int.
+    """
+    def __init__(self,
+                 display: Graphics,
+                 data: Optional[bytearray] = None) -> None:
+        self.display = display
+        self.width, self.height = display.get_bounds()
+        self.data = data if data is not None \
+            else bytearray(self.width * self.height * 3)
+        self._colour = bytearray(3)
+
+    def create_pen(self, r: int, g: int, b: int) -> Any:
+        return self.display.create_pen(r, g, b)
+
+    def set_pen(self, pen: Any) -> None:
+        colour = self._colour
+        if isinstance(pen, int):
+            colour[0], colour[1], colour[2] = \
+                (pen >> 16) & 0xff, (pen >> 8) & 0xff, pen & 0xff
+        else:
+            # The emulator's pens are objects.
+            colour[0], colour[1], colour[2] = pen.as_tuple()
+
+    def get_bounds(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    def pixel(self, x: int, y: int) -> None:
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return
+        i = (y * self.width + x) * 3
+        self.data[i:i + 3] = self._colour
+
+    def line(self, x1: int, y1: int, x2: int, y2: int) -> None:
+        draw_line(self.pixel, x1, y1, x2, y2)
+
+    def fill(self, tl_x: int, tl_y: int, br_x: int, br_y: int) -> None:
+        x1, y1 = max(tl_x, 0), max(tl_y, 0)
+        x2, y2 = min(br_x, self.width), min(br_y, self.height)
+        if x2 <= x1 or y2 <= y1:
+            return
+
+        # Fill the first row by doubling what is already filled, then copy
+        # it to the others.
+        data = memoryview(self.data)
+        start = (y1 * self.width + x1) * 3
+        length = (x2 - x1) * 3
+        data[start:start + 3] = self._colour
+        done = 3
+        while done < length:
+            step = min(done, length - done)
+            data[start + done:start + done + step] = data[start:start + step]
+            done += step
+        row = data[start:start + length]
+        for y in range(y1 + 1, y2):
+            i = (y * self.width + x1) * 3
+            data[i:i + length] = row
+
+    def clear(self) -> None:
+        self.fill(0, 0, self.width, self.height)
+
+    def update(self) -> None:
+        """Does nothing, as the buffer is shown by a transition."""
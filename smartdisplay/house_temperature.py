@@ -17,12 +17,15 @@
 
 import math
 try:
-    from typing import Tuple
+    from typing import Any, Dict, Optional, Tuple
 except ImportError:
     pass
-import urequests
 
-from i75 import I75, render_text, text_boundingbox
+from i75 import I75, render_text
+
+from .backend import Backend
+from .text_metrics import text_boundingbox, warm
+from .utils import render_stale_marker
 
 FONT = "cg_pixel_3x5_5"
 
@@ -49,23 +52,41 @@ ROOMS = [
     Room("Outside:", "outside", (2, 24, 28)),
 ]
 
+warm(FONT, [TITLE] + [room.title for room in ROOMS])
+
 
 class HouseTemperature:
-    def __init__(self, backend: str) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 data: Optional[Dict[str, Any]] = None) -> None:
         self.rendered = False
         self.total_time = 0
+        self.stale = False
+
+        if data is None:
+            data = HouseTemperature.fetch(i75, backend, image)
+        self.data = data
+
+    @staticmethod
+    def fetch(i75: I75, backend: Backend, image: bytearray) -> Dict[str, Any]:
+        return backend.get_json("/house_temperature")
 
-        r = urequests.get(f"http://{backend}:6001/house_temperature", timeout=10)
-        try:
-            self.data = r.json()
-        finally:
-            r.close()
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        return self.time_left() if self.rendered else 0
+
+    def restart(self) -> None:
+        self.total_time = 0
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
 
         if self.rendered:
-            return self.total_time > 30000
+            return self.total_time >= 30000
 
         white = i75.display.create_pen(255, 255, 255)
         blue = i75.display.create_pen(0, 0, 255)
@@ -139,6 +160,9 @@ class HouseTemperature:
 
             y += font_height + 2
 
+        if self.stale:
+            render_stale_marker(i75)
+
         i75.display.update()
         self.rendered = True
 
@@ -0,0 +1,72 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+try:
+    from typing import Any, Optional
+except ImportError:
+    pass
+
+
+class LRUCache:
+    """
+    A dictionary holding at most max_size items, which forgets the least
+    recently used item to make room for a new one.
+
+    MicroPython's OrderedDict has no move_to_end, so an item is moved to
+    the end by removing it and adding it again.
+    """
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items: Any = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._items
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Returns the item for key, or None if it isn't in the cache."""
+        value = self._items.pop(key, None)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items[key] = value
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """Adds an item, forgetting the oldest one if the cache is full."""
+        if key in self._items:
+            del self._items[key]
+        elif len(self._items) >= self.max_size:
+            del self._items[next(iter(self._items))]
+        self._items[key] = value
+
+    def remove(self, key: Any) -> Optional[Any]:
+        """Removes and returns the item for key, if it is in the cache."""
+        return self._items.pop(key, None)
+
+    def clear(self) -> None:
+        self._items = OrderedDict()
+
+    def stats(self) -> str:
+        return f"{len(self._items)}/{self.max_size} items, " \
+            + f"{self.hits} hits, {self.misses} misses"
@@ -0,0 +1,69 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import struct
+try:
+    from typing import Any, Dict, Tuple
+except ImportError:
+    pass
+
+
+class PackedData:
+    """
+    The data for a screen, which the backend can send either as JSON or
+    packed with struct, which is much cheaper to decode.
+
+    Subclasses list their fields in __slots__, in the order they are packed
+    by FORMAT. String fields are fixed length, padded with zero bytes. The
+    media type that asks for the packed form is TYPE, and it includes a
+    version number that must change whenever FORMAT does.
+    """
+    __slots__: Tuple[str, ...] = ()
+
+    TYPE = ""
+    FORMAT = ""
+
+    @classmethod
+    def unpack(cls, buf: Any) -> Any:
+        """Returns the data packed in buf."""
+        obj = cls()
+        values = struct.unpack_from(cls.FORMAT, buf)
+        for i in range(len(values)):
+            value = values[i]
+            if isinstance(value, bytes):
+                value = value.rstrip(b"\0").decode("utf-8")
+            setattr(obj, cls.__slots__[i], value)
+        return obj
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> Any:
+        """Returns the data from its parsed JSON form."""
+        obj = cls()
+        for name in cls.__slots__:
+            setattr(obj, name, data[name])
+        return obj
+
+    def pack(self) -> bytes:
+        values = []
+        for name in self.__slots__:
+            value = getattr(self, name)
+            values.append(value.encode("utf-8")
+                          if isinstance(value, str) else value)
+        return struct.pack(self.FORMAT, *values)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
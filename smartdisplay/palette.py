@@ -0,0 +1,75 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import math
+import random
+try:
+    from typing import Any, List
+except ImportError:
+    pass
+
+from i75 import I75
+
+
+def from_hsv(h, s, v):
+    i = math.floor(h * 6.0)
+    f = h * 6.0 - i
+    v *= 255.0
+    p = v * (1.0 - s)
+    q = v * (1.0 - f * s)
+    t = v * (1.0 - (1.0 - f) * s)
+
+    i = int(i) % 6
+    if i == 0:
+        return int(v), int(t), int(p)
+    if i == 1:
+        return int(q), int(v), int(p)
+    if i == 2:
+        return int(p), int(v), int(t)
+    if i == 3:
+        return int(p), int(q), int(v)
+    if i == 4:
+        return int(t), int(p), int(v)
+    if i == 5:
+        return int(v), int(p), int(q)
+
+
+class HueWheel:
+    """
+    Pens for colours spaced evenly around the hue wheel, at full saturation
+    and brightness.
+
+    The pens are created the first time one is asked for, and then shared,
+    so picking a colour is just an index, however many are picked.
+    """
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.pens: List[Any] = []
+
+    def pen(self, i75: I75, index: int) -> Any:
+        """Returns the pen index steps around the wheel, wrapping around."""
+        if not self.pens:
+            for hue in range(self.size):
+                self.pens.append(i75.display.create_pen(
+                    *from_hsv(hue / self.size, 1.0, 1.0)))
+        return self.pens[index % self.size]
+
+    def random(self, i75: I75) -> Any:
+        return self.pen(i75, random.randint(0, self.size - 1))
+
+
+HUE_WHEEL = HueWheel(64)
@@ -0,0 +1,86 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import sys
+try:
+    from typing import Any, Dict, Tuple
+except ImportError:
+    pass
+
+# Maps each screen name to the module and class that implement it, and
+# any extra arguments the class is created with. Every screen is created
+# as cls(i75, backend, image, *args), plus the data from its fetch static
+# method, if it has one, which is called as fetch(i75, backend, image,
+# *args).
+SCREENS: Dict[str, Tuple[str, str, Tuple[Any, ...]]] = {
+    "advent": ("advent", "Advent", ()),
+    "balls": ("balls", "BouncingBalls", ()),
+    "balls_busy": ("balls", "BouncingBalls", (True, )),
+    "blackout": ("blackout", "Blackout", ()),
+    "christmas": ("christmas", "Christmas", ()),
+    "clock": ("clock", "Clock", ()),
+    "current_weather": ("current_weather", "CurrentWeather", ()),
+    "house_temperature": ("house_temperature", "HouseTemperature", ()),
+    "solar": ("solar", "Solar", ()),
+    "sonos": ("sonos", "Sonos", (False,)),
+    "sonos_quick": ("sonos", "Sonos", (True,)),
+    "trains_home": ("trains", "Trains", (False,)),
+    "trains_to_london": ("trains", "Trains", (True,)),
+    "water_gas": ("water_gas", "WaterGas", ()),
+}
+
+# Screens which are only shown for a few weeks of the year, so are
+# unloaded again once they have finished.
+UNLOAD_AFTER_USE = ("advent", "christmas")
+
+# Screens that need much of the heap, so the images kept in RAM are
+# forgotten before they are created.
+NEEDS_HEAP = ("balls_busy", "christmas")
+
+# Screens whose data is cached on flash, so they can be shown straight
+# away from the last good copy, and when the backend can't be reached.
+CACHED = ("current_weather",
+          "house_temperature",
+          "solar",
+          "trains_home",
+          "trains_to_london",
+          "water_gas")
+
+
+def get_screen(screen_name: str) -> Tuple[Any, Tuple[Any, ...]]:
+    """
+    Returns the class for the given screen, and the extra arguments it is
+    created with, importing its module if needed. Unknown screens are
+    shown as the clock.
+    """
+    module, cls, args = SCREENS.get(screen_name, SCREENS["clock"])
+    return getattr(__import__("smartdisplay." + module,
+                              None,
+                              None,
+                              (cls,)), cls), args
+
+
+def unload_screen(screen_name: str) -> None:
+    """
+    Removes the module for the given screen, so its memory can be
+    reclaimed by the next garbage collection.
+    """
+    module = SCREENS.get(screen_name, SCREENS["clock"])[0]
+    sys.modules.pop("smartdisplay." + module, None)
+    package = sys.modules.get("smartdisplay")
+    if package is not None and hasattr(package, module):
+        delattr(package, module)
@@ -1,6 +1,6 @@
 #!/usr/bin/env micropython
 # smartdisplay-frontend
-# Copyright (C) 2024 Andrew Wilkinson
+# Copyright (C) 2023 Andrew Wilkinson
 #
 # This program is free software: you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
@@ -15,7 +15,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import math
+try:
+    from typing import Any
+except ImportError:
+    pass
+
+from i75 import I75
+
+from .damage import unwrap
 
 
 class SingleBitBuffer:
@@ -24,11 +31,13 @@ class SingleBitBuffer:
 
     Can be any size, although widths not exactly divisible by 8 have
     some memory wastage, as each row is stored as a byte array.
+
+    Bit x & 7 of byte x >> 3 in each row is the pixel at x.
     """
     def __init__(self, width: int, height: int) -> None:
         self.width = width
         self.height = height
-        self._row_width = math.ceil(self.width / 8.0)
+        self._row_width = (self.width + 7) >> 3
         self._is_dirty = False
         self._data: bytearray = bytearray(self._row_width * self.height)
 
@@ -37,29 +46,133 @@ class SingleBitBuffer:
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return
         self._is_dirty = True
-        byte = self._row_width * y + math.floor(x / 8.0)
-        self._data[byte] = self._data[byte] | (1 << (x % 8))
+        byte = self._row_width * y + (x >> 3)
+        self._data[byte] |= 1 << (x & 7)
 
     def clear_pixel(self, x: int, y: int) -> None:
         """Clear the given pixel."""
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return
-        byte = self._row_width * y + math.floor(x / 8.0)
-        self._data[byte] = self._data[byte] & ~(1 << (x % 8))
+        byte = self._row_width * y + (x >> 3)
+        self._data[byte] &= ~(1 << (x & 7))
 
     def is_pixel_set(self, x: int, y: int) -> bool:
         """Returns true if the given pixel is set."""
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return False
-        byte = self._row_width * y + math.floor(x / 8.0)
-        return (self._data[byte] & (1 << (x % 8))) != 0
+        byte = self._row_width * y + (x >> 3)
+        return (self._data[byte] >> (x & 7)) & 1 != 0
 
     def is_pixel_group_set(self, x: int, y: int) -> bool:
         """Returns true if any pixel is a group of 8 is set."""
         if x < 0 or y < 0 or x >= self.width or y >= self.height:
             return False
-        byte = self._row_width * y + math.floor(x / 8.0)
-        return self._data[byte] != 0
+        return self._data[self._row_width * y + (x >> 3)] != 0
+
+    def set_span(self, x1: int, x2: int, y: int, value: bool = True) -> None:
+        """
+        Sets, or with value false clears, the pixels of row y from x1 up
+        to, but not including, x2.
+        """
+        x1, x2 = max(x1, 0), min(x2, self.width)
+        if x1 >= x2 or y < 0 or y >= self.height:
+            return
+        if value:
+            self._is_dirty = True
+        data = self._data
+        row = self._row_width * y
+        first, last = row + (x1 >> 3), row + ((x2 - 1) >> 3)
+        first_mask = (0xff << (x1 & 7)) & 0xff
+        last_mask = 0xff >> (7 - ((x2 - 1) & 7))
+        if first == last:
+            first_mask &= last_mask
+        if value:
+            data[first] |= first_mask
+        else:
+            data[first] &= ~first_mask
+        if first == last:
+            return
+        for byte in range(first + 1, last):
+            data[byte] = 0xff if value else 0
+        if value:
+            data[last] |= last_mask
+        else:
+            data[last] &= ~last_mask
+
+    def is_span_set(self, x1: int, x2: int, y: int) -> bool:
+        """
+        Returns true if any pixel of row y from x1 up to, but not
+        including, x2 is set.
+        """
+        x1, x2 = max(x1, 0), min(x2, self.width)
+        if x1 >= x2 or y < 0 or y >= self.height:
+            return False
+        data = self._data
+        row = self._row_width * y
+        first, last = row + (x1 >> 3), row + ((x2 - 1) >> 3)
+        first_mask = (0xff << (x1 & 7)) & 0xff
+        last_mask = 0xff >> (7 - ((x2 - 1) & 7))
+        if first == last:
+            return data[first] & first_mask & last_mask != 0
+        if data[first] & first_mask or data[last] & last_mask:
+            return True
+        for byte in range(first + 1, last):
+            if data[byte]:
+                return True
+        return False
+
+    def fill_rect(self,
+                  x: int,
+                  y: int,
+                  width: int,
+                  height: int,
+                  value: bool = True) -> None:
+        """Sets, or with value false clears, a rectangle of pixels."""
+        for row in range(max(y, 0), min(y + height, self.height)):
+            self.set_span(x, x + width, row, value)
+
+    def or_buffer(self, other: "SingleBitBuffer") -> None:
+        """Sets each pixel that is set in other, which is the same size."""
+        data, other_data = self._data, other._data
+        for byte in range(len(data)):
+            data[byte] |= other_data[byte]
+        self._is_dirty = self._is_dirty or other._is_dirty
+
+    def and_buffer(self, other: "SingleBitBuffer") -> None:
+        """Clears each pixel that is not set in other."""
+        data, other_data = self._data, other._data
+        for byte in range(len(data)):
+            data[byte] &= other_data[byte]
+
+    def xor_buffer(self, other: "SingleBitBuffer") -> None:
+        """Flips each pixel that is set in other."""
+        data, other_data = self._data, other._data
+        for byte in range(len(data)):
+            data[byte] ^= other_data[byte]
+        self._is_dirty = self._is_dirty or other._is_dirty
+
+    def blit(self, i75: I75, pen: Any, x: int = 0, y: int = 0) -> None:
+        """
+        Draws the set pixels with pen, with the top left corner at (x, y).
+        Groups of 8 pixels with none set are skipped in one go.
+        """
+        display = unwrap(i75.display, x, y, x + self.width, y + self.height)
+        display.set_pen(pen)
+        pixel = display.pixel
+
+        data = self._data
+        byte = 0
+        for row in range(self.height):
+            py = y + row
+            for column in range(0, self._row_width << 3, 8):
+                bits = data[byte]
+                byte += 1
+                px = x + column
+                while bits:
+                    if bits & 1:
+                        pixel(px, py)
+                    bits >>= 1
+                    px += 1
 
     def reset(self):
         """
@@ -69,6 +182,5 @@ class SingleBitBuffer:
         """
         if not self._is_dirty:
             return
-        for b in range(len(self._data)):
-            self._data[b] = 0
-        self._is_dirty = False
\ No newline at end of file
+        self._data[:] = bytes(len(self._data))
+        self._is_dirty = False
@@ -0,0 +1,168 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+import random
+try:
+    from typing import List, Sequence, Tuple
+except ImportError:
+    pass
+
+from i75 import I75
+
+from .compositor import Compositor
+from .single_bit_buffer import SingleBitBuffer
+
+# How many random bytes each field draws new flakes' positions from. A
+# prime, so the positions don't repeat in step with the flakes.
+RANDOM_BYTES = 251
+
+# How many moves a flake drifts one way before turning.
+BOUNCE = 10
+
+
+class SnowField:
+    """
+    Snowflakes that fall down the panel a pixel at a time, drifting from
+    side to side.
+
+    The flakes are held in arrays rather than an object per flake, so an
+    update is one pass over them that creates no objects. Where a flake
+    that falls off the bottom starts again is taken from random bytes
+    picked when the field is made.
+
+    The flakes are grouped into depths, given as (count, slowest,
+    fastest), where the speeds are the milliseconds a flake takes to move
+    a pixel. Flakes are numbered from the first depth on.
+    """
+    def __init__(self,
+                 width: int,
+                 height: int,
+                 depths: Sequence[Tuple[int, int, int]],
+                 size: int = 1) -> None:
+        self.width = width
+        self.height = height
+        self.size = size
+        self.count = sum(depth[0] for depth in depths)
+
+        count = self.count
+        self.x = array("h", [0] * count)
+        self.y = array("h", [0] * count)
+        self.old_x = array("h", [0] * count)
+        self.old_y = array("h", [0] * count)
+        self.delay = array("i", [0] * count)
+        self.speed = array("h", [0] * count)
+        self.drift = array("b", [0] * count)
+        self.bounce = array("b", [0] * count)
+        self.depth = bytearray(count)
+        # Which flakes moved in the last update.
+        self.moved = bytearray(count)
+
+        self._random = bytes(random.getrandbits(8)
+                             for _ in range(RANDOM_BYTES))
+        self._next_random = 0
+
+        i = 0
+        for depth, (number, slowest, fastest) in enumerate(depths):
+            for _ in range(number):
+                self.x[i] = random.randint(0, width - size)
+                self.y[i] = random.randint(-size, height - 1)
+                self.old_x[i], self.old_y[i] = self.x[i], self.y[i]
+                self.speed[i] = random.randint(slowest, fastest)
+                self.drift[i] = random.choice((-1, 1))
+                self.bounce[i] = random.randint(3, BOUNCE)
+                self.depth[i] = depth
+                i += 1
+
+    def update(self, frame_time: int) -> int:
+        """
+        Moves the flakes that are due to move, and returns how many did.
+        """
+        x, y, old_x, old_y = self.x, self.y, self.old_x, self.old_y
+        delay, speed = self.delay, self.speed
+        drift, bounce, moved = self.drift, self.bounce, self.moved
+        stream, next_random = self._random, self._next_random
+        height, start = self.height, -self.size
+        span = self.width - self.size + 1
+
+        count = 0
+        for i in range(self.count):
+            wait = delay[i] + frame_time
+            if wait < speed[i]:
+                delay[i] = wait
+                moved[i] = 0
+                continue
+            delay[i] = wait - speed[i]
+
+            turns = bounce[i] - 1
+            if turns < 0:
+                drift[i] = -drift[i]
+                turns = BOUNCE
+            bounce[i] = turns
+
+            old_x[i], old_y[i] = x[i], y[i]
+            if y[i] >= height:
+                x[i] = (stream[next_random] * span) >> 8
+                next_random += 1
+                if next_random == RANDOM_BYTES:
+                    next_random = 0
+                y[i] = start
+            else:
+                x[i] += drift[i]
+                y[i] += 1
+            moved[i] = 1
+            count += 1
+
+        self._next_random = next_random
+        return count
+
+    def next_update(self) -> int:
+        """Returns how long until the next flake moves."""
+        delay, speed = self.delay, self.speed
+        soonest = speed[0] - delay[0] if self.count > 0 else 0
+        for i in range(1, self.count):
+            wait = speed[i] - delay[i]
+            if wait < soonest:
+                soonest = wait
+        return max(soonest, 0)
+
+    def set_pixels(self, masks: List[SingleBitBuffer]) -> None:
+        """Sets the pixel of each flake in the mask for its depth."""
+        x, y, depth = self.x, self.y, self.depth
+        for i in range(self.count):
+            masks[depth[i]].pixel(x[i], y[i])
+
+    def draw(self,
+             i75: I75,
+             compositor: Compositor,
+             masks: List[SingleBitBuffer]) -> None:
+        """
+        Moves the flakes that moved in the last update between pixels of
+        the mask for their depth, which is a layer of compositor, and
+        repaints the pixels that changed.
+        """
+        x, y, old_x, old_y = self.x, self.y, self.old_x, self.old_y
+        depth, moved = self.depth, self.moved
+        for i in range(self.count):
+            if moved[i]:
+                masks[depth[i]].clear_pixel(old_x[i], old_y[i])
+        # Another flake may have been on a pixel that was cleared.
+        self.set_pixels(masks)
+        for i in range(self.count):
+            if moved[i]:
+                compositor.repaint(i75, old_x[i], old_y[i])
+                compositor.repaint(i75, x[i], y[i])
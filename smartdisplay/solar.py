@@ -17,42 +17,93 @@
 
 import math
 try:
-    from typing import Tuple
+    from typing import Any, Tuple
 except ImportError:
     pass
-import urequests
 
-from i75 import I75, Image, render_text, text_boundingbox
+from i75 import I75, render_text
+
+from .assets import ASSETS
+from .backend import Backend
+from .packed import PackedData
+from .text_metrics import text_boundingbox, warm
+from .utils import render_stale_marker
 
 FONT = "cg_pixel_3x5_5"
 
 LIGHT_GAP = 4
 
+warm(FONT, ("House:", "Car:"))
+
+
+class SolarData(PackedData):
+    __slots__ = ("battery", "battery_change", "pv_power", "pv_generation",
+                 "current_power", "house_load", "house_wh", "house_cost",
+                 "car_wh", "car_cost")
+
+    TYPE = "application/x-smartdisplay-solar;v=1"
+    FORMAT = "<10f"
+
+    battery: float
+    battery_change: float
+    pv_power: float
+    pv_generation: float
+    current_power: float
+    house_load: float
+    house_wh: float
+    house_cost: float
+    car_wh: float
+    car_cost: float
+
 
 class Solar:
-    def __init__(self, backend: str) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 data: Any = None) -> None:
         self.rendered = False
         self.frame_time = 0
         self.total_time = 0
+        self.stale = False
         self.offset = 0
 
-        r = urequests.get(f"http://{backend}:6001/solar", timeout=10)
-        try:
-            self.data = r.json()
-        finally:
-            r.close()
+        if data is None:
+            data = Solar.fetch(i75, backend, image)
+        elif isinstance(data, dict):
+            # Cached data is always JSON.
+            data = SolarData.from_json(data)
+        self.data = data
+
+    @staticmethod
+    def fetch(i75: I75, backend: Backend, image: bytearray) -> SolarData:
+        return backend.get_json("/solar",
+                                SolarData.TYPE,
+                                SolarData.unpack,
+                                SolarData.from_json)
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        if not self.rendered:
+            return 0
+        return min(200 - self.frame_time, self.time_left())
+
+    def restart(self) -> None:
+        self.total_time = 0
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
 
         if self.rendered:
             self.frame_time += frame_time
-            if self.frame_time > 200:
+            if self.frame_time >= 200:
                 self.frame_time = self.frame_time % 200
                 self.offset = (self.offset + 1) % LIGHT_GAP
                 self.render_lines(i75)
                 i75.display.update()
-            return self.total_time > 30000
+            return self.total_time >= 30000
 
         white = i75.display.create_pen(255, 255, 255)
         yellow = i75.display.create_pen(255, 255, 0)
@@ -63,47 +114,47 @@ class Solar:
 
         i75.display.set_pen(white)
 
-        if self.data['battery_change'] > 500:
+        if self.data.battery_change > 500:
             battery_change_colour = green
-        elif self.data['battery_change'] > 100:
+        elif self.data.battery_change > 100:
             battery_change_colour = yellow
-        elif self.data['battery_change'] > -100:
+        elif self.data.battery_change > -100:
             battery_change_colour = white
         else:
             battery_change_colour = red
-        if abs(self.data['battery_change']) > 1000:
-            battery_change = f"{self.data['battery_change']/1000:0.1f}kw"
+        if abs(self.data.battery_change) > 1000:
+            battery_change = f"{self.data.battery_change/1000:0.1f}kw"
         else:
-            battery_change = f"{self.data['battery_change']:0.0f}w"
+            battery_change = f"{self.data.battery_change:0.0f}w"
 
-        pv_power_colour = white if self.data['pv_power'] < 100 else (
-            green if self.data['pv_power'] > 1000 else yellow
+        pv_power_colour = white if self.data.pv_power < 100 else (
+            green if self.data.pv_power > 1000 else yellow
         )
-        if self.data['pv_power'] > 1.0:
-            pv_power = f"{self.data['pv_power']:0.1f}kw"
+        if self.data.pv_power > 1.0:
+            pv_power = f"{self.data.pv_power:0.1f}kw"
         else:
-            pv_power = f"{self.data['pv_power']*1000:0.0f}w"
+            pv_power = f"{self.data.pv_power*1000:0.0f}w"
 
-        if self.data['pv_generation'] > 1.0:
-            pv_generation = f"{self.data['pv_generation']:0.1f}kwh"
+        if self.data.pv_generation > 1.0:
+            pv_generation = f"{self.data.pv_generation:0.1f}kwh"
         else:
-            pv_generation = f"{self.data['pv_generation']*1000:0.0f}wh"
+            pv_generation = f"{self.data.pv_generation*1000:0.0f}wh"
 
-        current_power_colour = red if self.data['current_power'] > 250 else (
-            green if self.data['current_power'] < 250 else white
+        current_power_colour = red if self.data.current_power > 250 else (
+            green if self.data.current_power < 250 else white
         )
-        if abs(self.data['current_power']) > 1000:
-            current_power = f"{self.data['current_power']/1000:0.1f}kw"
+        if abs(self.data.current_power) > 1000:
+            current_power = f"{self.data.current_power/1000:0.1f}kw"
         else:
-            current_power = f"{self.data['current_power']:0.0f}w"
+            current_power = f"{self.data.current_power:0.0f}w"
 
-        house_load_colour = red if self.data["house_load"] > 1000 else (
-            yellow if self.data["house_load"] > 500 else green
+        house_load_colour = red if self.data.house_load > 1000 else (
+            yellow if self.data.house_load > 500 else green
         )
-        if self.data['house_load'] > 1:
-            house_load = f"{self.data['house_load']:0.1f}kw"
+        if self.data.house_load > 1:
+            house_load = f"{self.data.house_load:0.1f}kw"
         else:
-            house_load = f"{self.data['house_load']*1000:0.0f}w"
+            house_load = f"{self.data.house_load*1000:0.0f}w"
 
         prefixes = {}
         max_length = 0
@@ -118,10 +169,10 @@ class Solar:
                     max_length - prefixes["House"],
                     1,
                     "House:")
-        house_wh = f"{self.data['house_wh']/1000:0.1f}kwh"
-        house_cost = f"£{self.data['house_cost']:0.2f}"
-        car_wh = f"{self.data['car_wh']/1000:0.1f}kwh"
-        car_cost = f"£{self.data['car_cost']:0.2f}"
+        house_wh = f"{self.data.house_wh/1000:0.1f}kwh"
+        house_cost = f"£{self.data.house_cost:0.2f}"
+        car_wh = f"{self.data.car_wh/1000:0.1f}kwh"
+        car_cost = f"£{self.data.car_cost:0.2f}"
         house_wh_pre_point, _ = text_boundingbox(FONT,
                                                  house_wh.split(".")[0])
         house_cost_pre_point, _ = text_boundingbox(FONT,
@@ -160,7 +211,7 @@ class Solar:
                     1 + font_height * 3,
                     car_cost)
 
-        icon = Image.load(open("images/sun_icon.i75", "rb"))
+        icon = ASSETS.load("images/sun_icon.i75")
         icon.set_colour(255, 255, 0)
         icon.render(i75.display, 10, font_height * 4)
 
@@ -187,16 +238,16 @@ class Solar:
 
         i75.display.set_pen(battery_green)
         for i in range(1, 8):
-            if self.data['battery'] > i * 14:
+            if self.data.battery > i * 14:
                 i75.display.line(11,
                                  19 + font_height * 5 - i,
                                  14,
                                  19 + font_height * 5 - i)
 
-        i75.display.set_pen(red if self.data['battery'] < 40 else (
-            green if self.data['battery'] > 60 else yellow
+        i75.display.set_pen(red if self.data.battery < 40 else (
+            green if self.data.battery > 60 else yellow
         ))
-        perc_text = f"{self.data['battery']:0.0f}%"
+        perc_text = f"{self.data.battery:0.0f}%"
         perc_width, _ = text_boundingbox(FONT, perc_text)
         charge_width, _ = text_boundingbox(FONT,
                                            battery_change)
@@ -213,7 +264,7 @@ class Solar:
                     21 + font_height * 6,
                     battery_change)
 
-        icon = Image.load(open("images/pylon_icon.i75", "rb"))
+        icon = ASSETS.load("images/pylon_icon.i75")
         icon.render(i75.display, 50, 11 + font_height * 6)
 
         text_width, _ = text_boundingbox(FONT, current_power)
@@ -224,7 +275,7 @@ class Solar:
                     21 + font_height * 6,
                     current_power)
 
-        icon = Image.load(open("images/house_icon.i75", "rb"))
+        icon = ASSETS.load("images/house_icon.i75")
         icon.render(i75.display, 30, 11 + font_height * 6)
 
         text_width, _ = text_boundingbox(FONT, house_load)
@@ -237,6 +288,9 @@ class Solar:
 
         self.render_lines(i75)
 
+        if self.stale:
+            render_stale_marker(i75)
+
         i75.display.update()
         self.rendered = True
 
@@ -247,14 +301,14 @@ class Solar:
         light_green = i75.display.create_pen(168, 230, 29)
         dark_green = i75.display.create_pen(80, 110, 14)
 
-        solar_on = self.data['pv_power'] >= 0.1
+        solar_on = self.data.pv_power >= 0.1
 
         # Solar output
         self.vertical(13, 23 + 10, 23 + 12, i75,
                       light_green if solar_on else white,
                       dark_green if solar_on else white, self.offset)
         # Battery output
-        if self.data['battery_change'] <= -100:
+        if self.data.battery_change <= -100:
             self.vertical(13,
                           23 + 16,
                           23 + 14,
@@ -262,7 +316,7 @@ class Solar:
                           light_green,
                           dark_green,
                           self.offset)
-        elif self.data['battery_change'] >= 100:
+        elif self.data.battery_change >= 100:
             self.vertical(13,
                           23 + 14,
                           23 + 16,
@@ -279,7 +333,7 @@ class Solar:
                           white,
                           self.offset)
         # Link to house
-        pv_system = self.data['pv_power'] * 1000 - self.data['battery_change']
+        pv_system = self.data.pv_power * 1000 - self.data.battery_change
         if pv_system <= -100:
             self.horizontal(32,
                             13,
@@ -305,7 +359,7 @@ class Solar:
                             white,
                             self.offset)
 
-        if self.data['current_power'] >= 100:
+        if self.data.current_power >= 100:
             # Grid up
             self.vertical(53,
                           23 + 20,
@@ -322,7 +376,7 @@ class Solar:
                             light_green,
                             dark_green,
                             (self.offset + 1) % LIGHT_GAP)
-        elif self.data['current_power'] <= -100:
+        elif self.data.current_power <= -100:
             self.vertical(53,
                           23 + 13,
                           23 + 20,
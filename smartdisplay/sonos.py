@@ -15,51 +15,85 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from i75 import Colour, I75, render_text, text_boundingbox, wrap_text
-import urequests
+try:
+    from typing import Any, Dict, Optional
+except ImportError:
+    pass
+
+from i75 import I75, render_text, wrap_text
+
+from .backend import Backend
+from .text_metrics import text_boundingbox
+from .utils import blit, fade_table, stream_image
 
 FONT = "cg_pixel_3x5_5"
 
 
 class Sonos:
-    def __init__(self, backend: str, image: bytearray, quick: bool) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 quick: bool,
+                 track_info: Optional[Dict[str, Any]] = None) -> None:
         self.backend = backend
         self.rendered = False
         self.total_time = 0
         self.rendered_text = False
-        self.track_info = None
+        self.track_info = track_info
         self.image = image
         self.quick = quick
+        # Without prefetched data, the art is drawn as it downloads, so
+        # the first frame shouldn't be drawn offscreen.
+        self.streams = track_info is None
+
+    @staticmethod
+    def fetch(i75: I75,
+              backend: Backend,
+              image: bytearray,
+              quick: bool,
+              draw: bool = False) -> Dict[str, Any]:
+        """
+        Fetch the current track details, and the album art into image if
+        there is any. With draw, the art is drawn row by row as it arrives.
+        """
+        track_info = backend.get_json("/sonos")
+
+        # Nothing is playing, so there's no art to show.
+        if track_info is None:
+            return {"album_art": None}
+
+        if track_info["album_art"] and draw:
+            stream_image(i75, backend, "/sonos/art", image)
+        elif track_info["album_art"]:
+            backend.get_into("/sonos/art", image)
+
+        return track_info
+
+    def time_left(self) -> int:
+        return (15000 if self.quick else 30000) - self.total_time
+
+    def next_frame(self) -> int:
+        if not self.rendered:
+            return 0
+        if not self.rendered_text:
+            return max(0, 10000 - self.total_time)
+        return self.time_left()
 
     def render_art(self, i75: I75) -> bool:
-        r = urequests.get(f"http://{self.backend}:6001/sonos", timeout=10)
-        try:
-            self.track_info = r.json()
-        finally:
-            r.close()
-
-        if self.track_info is None or not self.track_info["album_art"]:
+        if self.track_info is None:
+            # Nothing was prefetched, so show the art as it downloads.
+            self.track_info = Sonos.fetch(i75,
+                                          self.backend,
+                                          self.image,
+                                          self.quick,
+                                          draw=True)
+        elif self.track_info["album_art"]:
+            blit(i75, self.image)
+            i75.display.update()
+
+        if not self.track_info["album_art"]:
             return True
-
-        try:
-            r = urequests.get(f"http://{self.backend}:6001/sonos/art",
-                              stream=True, timeout=10)
-            r.raw.readinto(self.image)
-        finally:
-            r.close()
-
-        try:
-            for y in range(64):
-                for x in range(64):
-                    Colour.fromint32(self.image[(y * 64 + x) * 3] << 24
-                                     | self.image[(y * 64 + x) * 3 + 1] << 16
-                                     | self.image[(y * 64 + x) * 3 + 2] << 8
-                                     | 255).set_colour(i75)
-                    i75.display.pixel(x, y)
-        finally:
-            r.close()
-
-        i75.display.update()
         self.rendered = True
 
         return False
@@ -68,26 +102,27 @@ class Sonos:
         self.rendered_text = True
 
         y = 64
-        if self.track_info is None:
+        track_info = self.track_info
+        if track_info is None:
             return
 
         def has_param(p: str) -> bool:
-            return self.track_info[p] is not None \
-                   and len(self.track_info[p]) > 0
+            return track_info[p] is not None \
+                   and len(track_info[p]) > 0
 
         has_artist = has_param("artist")
         has_album = has_param("album")
         has_track = has_param("track")
         if has_artist:
-            y = self.render_text(i75, y, self.track_info["artist"])
+            y = self.render_text(i75, y, track_info["artist"])
         if has_artist and has_album:
             y = self.render_line(i75, y)
         if has_album:
-            y = self.render_text(i75, y, self.track_info["album"])
+            y = self.render_text(i75, y, track_info["album"])
         if has_track and (has_artist or has_album):
             y = self.render_line(i75, y)
         if has_track:
-            y = self.render_text(i75, y, self.track_info["track"])
+            y = self.render_text(i75, y, track_info["track"])
 
         i75.display.update()
 
@@ -115,21 +150,18 @@ class Sonos:
 
     def fade_image(self, i75: I75, y1: int, y2: int) -> None:
         assert self.image is not None
-        for py in range(max(0, y1), min(y2, 64)):
-            for px in range(64):
-                Colour.fromint32(
-                    round(0.5 * self.image[(py * 64 + px) * 3]) << 24
-                    | round(0.5 * self.image[(py * 64 + px) * 3 + 1]) << 16
-                    | round(0.5 * self.image[(py * 64 + px) * 3 + 2]) << 8
-                    | 255).set_colour(i75)
-                i75.display.pixel(px, py)
+        blit(i75,
+             self.image,
+             start_y=max(0, y1),
+             end_y=min(y2, 64),
+             table=fade_table(0.5))
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
         if not self.rendered and self.render_art(i75):
             return True
 
-        if not self.rendered_text and (self.total_time > 10000 or self.quick):
+        if not self.rendered_text and (self.total_time >= 10000 or self.quick):
             self.render_track_details(i75)
 
-        return self.total_time > (15000 if self.quick else 30000)
+        return self.total_time >= (15000 if self.quick else 30000)
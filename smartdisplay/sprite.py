@@ -0,0 +1,72 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    from typing import Any
+except ImportError:
+    pass
+
+from i75 import I75
+from i75.image import SingleColourImage
+
+from .damage import unwrap
+
+
+class Sprite:
+    """
+    The lit pixels of a single colour image, held as (x, y) offsets, so
+    drawing it only visits the pixels that are lit, however big
+    the image is.
+    """
+    def __init__(self, width: int, height: int, offsets: bytes) -> None:
+        self.width = width
+        self.height = height
+        self.offsets = offsets
+
+    @staticmethod
+    def from_image(image: SingleColourImage) -> "Sprite":
+        """Finds the lit pixels of image, whose rows are packed 8 a byte."""
+        row_width = (image.width + 7) >> 3
+        offsets = bytearray()
+        for y in range(image.height):
+            for x in range(image.width):
+                byte = image.data[y * row_width + (x >> 3)]
+                if (byte >> (7 - (x & 7))) & 1:
+                    offsets.append(x)
+                    offsets.append(y)
+        return Sprite(image.width, image.height, bytes(offsets))
+
+    def draw(self, i75: I75, x: int, y: int, pen: Any) -> None:
+        """Draws the sprite with pen, with its top left corner at (x, y)."""
+        display = unwrap(i75.display, x, y, x + self.width, y + self.height)
+        display.set_pen(pen)
+        offsets = self.offsets
+        if self._inside(display, x, y):
+            for i in range(0, len(offsets), 2):
+                display.pixel(x + offsets[i], y + offsets[i + 1])
+            return
+
+        width, height = display.get_bounds()
+        for i in range(0, len(offsets), 2):
+            px, py = x + offsets[i], y + offsets[i + 1]
+            if 0 <= px < width and 0 <= py < height:
+                display.pixel(px, py)
+
+    def _inside(self, display: Any, x: int, y: int) -> bool:
+        width, height = display.get_bounds()
+        return x >= 0 and y >= 0 and x + self.width <= width \
+            and y + self.height <= height
@@ -0,0 +1,49 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    from typing import Iterable, Tuple
+except ImportError:
+    pass
+
+import i75
+
+from .lru import LRUCache
+
+# Enough for the labels of every screen, and the values of a few.
+TEXT_METRICS = LRUCache(128)
+
+
+def text_boundingbox(font: str, text: str, scale: int = 1) -> Tuple[int, int]:
+    """
+    Returns the size of text, like i75.text_boundingbox, remembering the
+    sizes of recently measured text.
+    """
+    key = (font, text, scale)
+    size = TEXT_METRICS.get(key)
+    if size is None:
+        size = i75.text_boundingbox(font, text, scale)
+        TEXT_METRICS.put(key, size)
+    return size
+
+
+def warm(font: str, texts: Iterable[str], scale: int = 1) -> None:
+    """Measures texts that are always shown, so they are ready when needed."""
+    for text in texts:
+        key = (font, text, scale)
+        if key not in TEXT_METRICS:
+            TEXT_METRICS.put(key, i75.text_boundingbox(font, text, scale))
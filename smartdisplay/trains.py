@@ -1,34 +1,193 @@
-from i75 import I75, Image, render_text, text_boundingbox, wrap_text
-import urequests
+import json
+try:
+    from typing import Any, Dict, List, Optional, Tuple
+except ImportError:
+    pass
+
+from i75 import I75, render_text, wrap_text
+
+from .assets import ASSETS
+from .backend import Backend
+from .text_metrics import text_boundingbox
+from .utils import render_stale_marker
 
 FONT = "cg_pixel_3x5_5"
 
 TRAIN_HOME_FILE = "images/train_home.i75"
 TRAIN_TO_LONDON_FILE = "images/train_to_london.i75"
 
+# Where the first train is drawn, if there's no message above it.
+TRAINS_TOP = 8
+
+# How much of the departures are read from the backend at a time.
+CHUNK_SIZE = 256
+
+QUOTE = ord('"')
+BACKSLASH = ord("\\")
+OPEN_BRACE = ord("{")
+CLOSE_BRACE = ord("}")
+OPEN_BRACKET = ord("[")
+CLOSE_BRACKET = ord("]")
+
+
+def train_heights(train: Dict[str, Any]) -> Tuple[int, int]:
+    """
+    Returns the height of the first line drawn for a train, and the height
+    of everything drawn for it.
+    """
+    _, first = text_boundingbox(FONT,
+                                train["scheduled"] + " "
+                                + train["destination"])
+    _, eta = text_boundingbox(FONT, train["eta"])
+    total = first + eta
+    if train.get("message") is not None:
+        _, message = text_boundingbox(FONT, train["message"])
+        total += message
+    return first, total
+
+
+class DeparturesParser:
+    """
+    Parses the departures JSON as it is read, keeping only the trains that
+    could fit on the screen. The rest of the trains are skipped over
+    without being parsed, so however many there are, no more than one
+    train's JSON is held at a time.
+    """
+    def __init__(self) -> None:
+        # Everything outside the list of trains, which is left empty.
+        self.top = bytearray()
+        self.train = bytearray()
+        self.trains: List[Dict[str, Any]] = []
+        self.y = TRAINS_TOP
+        self.full = False
+
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.in_trains = False
+        # Where the last string in top starts and ends.
+        self.string_start = 0
+        self.string_end = 0
+
+    def feed(self, buf: Any, length: int) -> None:
+        """Parses the next length bytes of the departures, from buf."""
+        top, train = self.top, self.train
+        depth, in_string, escape = self.depth, self.in_string, self.escape
+        in_trains = self.in_trains
+
+        for i in range(length):
+            c = buf[i]
+
+            if in_string:
+                if escape:
+                    escape = False
+                elif c == BACKSLASH:
+                    escape = True
+                elif c == QUOTE:
+                    in_string = False
+                    if depth == 1:
+                        self.string_end = len(top) + 1
+            elif c == QUOTE:
+                in_string = True
+                if depth == 1:
+                    self.string_start = len(top)
+            elif c == OPEN_BRACE or c == OPEN_BRACKET:
+                depth += 1
+                if depth == 2 and c == OPEN_BRACKET and \
+                        top[self.string_start + 1:self.string_end - 1] \
+                        == b"trains":
+                    in_trains = True
+                    top.extend(b"[]")
+                    continue
+            elif c == CLOSE_BRACE or c == CLOSE_BRACKET:
+                depth -= 1
+                if in_trains and depth == 1:
+                    in_trains = False
+                    continue
+                if in_trains and depth == 2:
+                    if not self.full:
+                        train.append(c)
+                        self._add_train()
+                        train = self.train
+                    continue
+
+            if not in_trains:
+                top.append(c)
+            elif depth >= 3 and not self.full:
+                train.append(c)
+
+        self.depth, self.in_string, self.escape = depth, in_string, escape
+        self.in_trains = in_trains
+
+    def result(self) -> Dict[str, Any]:
+        """Returns the departures, with just the trains that fit."""
+        data = json.loads(self.top)
+        data["trains"] = self.trains
+        return data
+
+    def _add_train(self) -> None:
+        train = json.loads(self.train)
+        self.train = bytearray()
+
+        first, total = train_heights(train)
+        # Any message above the trains only leaves less room.
+        if self.y + first > 64:
+            self.full = True
+            return
+        self.trains.append(train)
+        self.y += total
+
 
 class Trains:
-    def __init__(self, backend: str, departures: bool) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 departures: bool,
+                 data: Optional[Dict[str, Any]] = None) -> None:
         self.departures = departures
-        r = urequests.get(f"http://{backend}:6001/trains_"
-                          + f"{'to' if departures else 'from'}_london", timeout=10)
-        try:
-            data = r.json()
-        finally:
-            r.close()
+        if data is None:
+            data = Trains.fetch(i75, backend, image, departures)
         self.msg = data["msg"]
         self.trains = data["trains"]
         self.rendered = False
         self.total_time = 0
+        self.stale = False
+
+    @staticmethod
+    def fetch(i75: I75,
+              backend: Backend,
+              image: bytearray,
+              departures: bool) -> Dict[str, Any]:
+        backend.request("GET",
+                        f"/trains_{'to' if departures else 'from'}_london")
+
+        parser = DeparturesParser()
+        buf = bytearray(CHUNK_SIZE)
+        while True:
+            n = backend.readinto(buf)
+            if n == 0:
+                break
+            parser.feed(buf, n)
+        return parser.result()
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
+
+    def next_frame(self) -> int:
+        return self.time_left() if self.rendered else 0
+
+    def restart(self) -> None:
+        self.total_time = 0
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
 
         if self.rendered:
-            return self.total_time > 30000
+            return self.total_time >= 30000
 
-        img = Image.load(open(TRAIN_TO_LONDON_FILE if self.departures
-                              else TRAIN_HOME_FILE, "rb"))
+        img = ASSETS.load(TRAIN_TO_LONDON_FILE if self.departures
+                          else TRAIN_HOME_FILE)
         img.render(i75.display, 0, 0)
 
         white = i75.display.create_pen(240, 240, 240)
@@ -36,7 +195,7 @@ class Trains:
         green = i75.display.create_pen(0, 240, 0)
         i75.display.set_pen(white)
 
-        i, y = 0, 8
+        i, y = 0, TRAINS_TOP
 
         if self.msg is not None and len(self.msg) > 0:
             raw_msg = self.msg
@@ -88,6 +247,9 @@ class Trains:
 
             i += 1
 
+        if self.stale:
+            render_stale_marker(i75)
+
         i75.display.update()
         self.rendered = True
 
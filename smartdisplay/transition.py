@@ -0,0 +1,190 @@
+#!/usr/bin/env micropython
+# smartdisplay-frontend
+# Copyright (C) 2024 Andrew Wilkinson
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+try:
+    from typing import Any, Optional
+except ImportError:
+    pass
+
+from i75 import I75
+
+from .damage import unwrap
+from .utils import blit, fade_table
+
+# How far through a transition is, is counted from 0 to STEPS.
+STEPS = 64
+
+# How often run draws a frame.
+FRAME_TIME = 50
+
+# A maximal 12 bit linear feedback shift register, which visits every
+# number from 1 to 4095 once before repeating.
+LFSR_TAPS = 0xE08
+
+
+class Transition:
+    """
+    Animates the panel from what it shows to incoming, an RGB888 image of
+    the whole panel, over duration milliseconds.
+
+    The position follows the time that has passed, rather than moving a
+    step a frame, so slow frames are caught up by drawing more at once and
+    the transition still ends on time. max_step limits how far one frame
+    can move, for effects that should be seen however late they run.
+
+    Subclasses draw the change between two positions. Those that need
+    what the panel showed before take it as outgoing, and treat it as
+    black if it isn't given.
+    """
+    def __init__(self,
+                 incoming: Any,
+                 duration: int,
+                 outgoing: Optional[Any] = None,
+                 max_step: int = STEPS) -> None:
+        self.incoming = incoming
+        self.outgoing = outgoing
+        self.duration = max(duration, 1)
+        self.max_step = max_step
+        self.elapsed = 0
+        self.position = 0
+
+    def step(self, i75: I75, frame_time: int) -> bool:
+        """
+        Moves the transition on by frame_time milliseconds, and returns
+        true once it has finished.
+        """
+        self.elapsed += frame_time
+        position = min(STEPS,
+                       self.elapsed * STEPS // self.duration,
+                       self.position + self.max_step)
+        if position > self.position:
+            self.draw(i75, self.position, position)
+            self.position = position
+            i75.display.update()
+        return self.position >= STEPS
+
+    def run(self, i75: I75) -> None:
+        """Plays the whole transition, a frame every FRAME_TIME ms."""
+        ticks = i75.ticks_ms()
+        frame_time = 0
+        while not self.step(i75, frame_time):
+            remaining = FRAME_TIME - i75.ticks_diff(i75.ticks_ms(), ticks)
+            if remaining > 0:
+                i75.sleep_ms(remaining)
+            now = i75.ticks_ms()
+            frame_time = i75.ticks_diff(now, ticks)
+            ticks = now
+
+    def draw(self, i75: I75, old: int, new: int) -> None:
+        """Draws the change from position old to new."""
+        raise NotImplementedError()
+
+
+class Wipe(Transition):
+    """Uncovers incoming a column at a time, from the right."""
+    def draw(self, i75: I75, old: int, new: int) -> None:
+        width, _ = i75.display.get_bounds()
+        blit(i75,
+             self.incoming,
+             start_x=width - width * new // STEPS,
+             end_x=width - width * old // STEPS)
+
+
+class Slide(Transition):
+    """
+    Slides incoming in from the right, pushing outgoing off to the left,
+    or over the top of the panel if there is no outgoing.
+    """
+    def draw(self, i75: I75, old: int, new: int) -> None:
+        width, _ = i75.display.get_bounds()
+        shift = width * new // STEPS
+        if self.outgoing is not None and shift < width:
+            blit(i75, self.outgoing, x=-shift, start_x=shift)
+        blit(i75, self.incoming, x=width - shift, end_x=shift)
+
+
+class Dissolve(Transition):
+    """
+    Changes the pixels to incoming one by one, in an order that looks
+    random but is the same each time, and needs no table to hold it.
+    """
+    def __init__(self,
+                 incoming: Any,
+                 duration: int,
+                 outgoing: Optional[Any] = None,
+                 max_step: int = STEPS) -> None:
+        super().__init__(incoming, duration, outgoing, max_step)
+        self._lfsr = 1
+
+    def draw(self, i75: I75, old: int, new: int) -> None:
+        width, height = i75.display.get_bounds()
+        display = unwrap(i75.display, 0, 0, width, height)
+
+        image = self.incoming
+        pixels = width * height
+        count = pixels * new // STEPS - pixels * old // STEPS
+        lfsr = self._lfsr
+        if old == 0:
+            # The register never visits 0, so that pixel goes first.
+            lfsr = 0
+        last = -1
+        for _ in range(count):
+            # Numbers beyond the panel are skipped, if it is smaller than
+            # the register's range.
+            while lfsr >= pixels:
+                lfsr = (lfsr >> 1) ^ (-(lfsr & 1) & LFSR_TAPS)
+            i = lfsr * 3
+            colour = image[i] << 16 | image[i + 1] << 8 | image[i + 2]
+            if colour != last:
+                display.set_pen(display.create_pen(image[i],
+                                                   image[i + 1],
+                                                   image[i + 2]))
+                last = colour
+            display.pixel(lfsr % width, lfsr // width)
+            lfsr = 1 if lfsr == 0 \
+                else (lfsr >> 1) ^ (-(lfsr & 1) & LFSR_TAPS)
+        self._lfsr = lfsr
+
+
+class Crossfade(Transition):
+    """Blends the whole panel from outgoing to incoming."""
+    def draw(self, i75: I75, old: int, new: int) -> None:
+        fade = new / STEPS
+        if self.outgoing is None:
+            blit(i75, self.incoming, table=fade_table(fade))
+            return
+
+        width, height = i75.display.get_bounds()
+        display = unwrap(i75.display, 0, 0, width, height)
+
+        # The two tables' levels add up to 256, and both round down, so
+        # the sum of a channel never overflows.
+        fade_in, fade_out = fade_table(fade), fade_table(1 - fade)
+        incoming, outgoing = self.incoming, self.outgoing
+        last = -1
+        i = 0
+        for y in range(height):
+            for x in range(width):
+                r = fade_in[incoming[i]] + fade_out[outgoing[i]]
+                g = fade_in[incoming[i + 1]] + fade_out[outgoing[i + 1]]
+                b = fade_in[incoming[i + 2]] + fade_out[outgoing[i + 2]]
+                colour = r << 16 | g << 8 | b
+                if colour != last:
+                    display.set_pen(display.create_pen(r, g, b))
+                    last = colour
+                display.pixel(x, y)
+                i += 3
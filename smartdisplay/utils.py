@@ -1,20 +1,160 @@
+try:
+    from typing import Any, Callable, Optional
+except ImportError:
+    pass
+
 from i75 import I75, Image
 
+from .backend import Backend
+from .damage import unwrap
+from .lru import LRUCache
+
+# Each fade level takes 256 bytes.
+FADE_TABLES = LRUCache(8)
+
+IDENTITY = bytes(range(256))
+
 
 def render_image_with_fade(i75: I75,
                            img: Image,
                            margin: int,
                            fade: float) -> None:
-    for y in range(img.height):
-        for x in range(img.width):
-            if (y < margin or y >= (img.height - margin)) \
-               or (x < margin or x >= (img.width - margin)):
-                pfade = 1.0
-            else:
-                pfade = fade
-            i75.display.set_pen(i75.display.create_pen(
-                int(img.data[3 * (y * img.width + x)] * pfade),
-                int(img.data[3 * (y * img.width + x) + 1] * pfade),
-                int(img.data[3 * (y * img.width + x) + 2] * pfade),
-            ))
-            i75.display.pixel(x, y)
+    """
+    Draws img with everything but a border margin pixels wide faded, so
+    text can be drawn over it.
+    """
+    width, height = img.width, img.height
+    inner = height - margin
+    blit(i75, img.data, 0, 0, width, height, end_y=margin)
+    blit(i75, img.data, 0, 0, width, height, end_x=margin,
+         start_y=margin, end_y=inner)
+    blit(i75, img.data, 0, 0, width, height, margin, width - margin,
+         margin, inner, fade_table(fade))
+    blit(i75, img.data, 0, 0, width, height, start_x=width - margin,
+         start_y=margin, end_y=inner)
+    blit(i75, img.data, 0, 0, width, height, start_y=inner)
+
+
+def fade_table(fade: float) -> bytes:
+    """
+    Returns a table mapping each channel value to its value faded to the
+    given fraction. Tables are built once for each level, in 256ths.
+    """
+    level = round(fade * 256)
+    table = FADE_TABLES.get(level)
+    if table is None:
+        table = bytes([(v * level) >> 8 for v in range(256)])
+        FADE_TABLES.put(level, table)
+    return table
+
+
+def render_stale_marker(i75: I75) -> None:
+    """
+    Marks the screen as showing old data, with an orange dot in the top
+    right corner.
+    """
+    i75.display.set_pen(i75.display.create_pen(255, 100, 0))
+    i75.display.fill(62, 0, 64, 2)
+
+
+def draw_line(pixel: Callable[[int, int], None],
+              x1: int,
+              y1: int,
+              x2: int,
+              y2: int) -> None:
+    """
+    Calls pixel for each point on the line from (x1, y1) to (x2, y2),
+    including both ends.
+
+    The same points are visited whatever pixel does, so a line drawn on
+    one layer can be exactly erased, or restored from another.
+    """
+    dx = abs(x2 - x1)
+    dy = -abs(y2 - y1)
+    step_x = 1 if x1 < x2 else -1
+    step_y = 1 if y1 < y2 else -1
+    error = dx + dy
+    while True:
+        pixel(x1, y1)
+        if x1 == x2 and y1 == y2:
+            return
+        twice = 2 * error
+        if twice >= dy:
+            error += dy
+            x1 += step_x
+        if twice <= dx:
+            error += dx
+            y1 += step_y
+
+
+def blit(i75: I75,
+         image: Any,
+         x: int = 0,
+         y: int = 0,
+         width: int = 64,
+         height: int = 64,
+         start_x: int = 0,
+         end_x: Optional[int] = None,
+         start_y: int = 0,
+         end_y: Optional[int] = None,
+         table: bytes = IDENTITY) -> None:
+    """
+    Draws an RGB888 image of width by height pixels, stored row by row,
+    with its top left corner at (x, y). Only the part of the image from
+    (start_x, start_y) up to (end_x, end_y) is drawn, with each channel
+    mapped through table, such as one from :func:`fade_table`.
+
+    A pen is only created when the colour changes from the pixel before,
+    so runs of the same colour cost just a pixel call each.
+    """
+    if end_x is None:
+        end_x = width
+    if end_y is None:
+        end_y = height
+
+    display = unwrap(i75.display,
+                     x + start_x, y + start_y,
+                     x + end_x, y + end_y)
+    create_pen = display.create_pen
+    set_pen = display.set_pen
+    pixel = display.pixel
+
+    last = -1
+    for row in range(start_y, end_y):
+        i = (row * width + start_x) * 3
+        py = y + row
+        for col in range(start_x, end_x):
+            r, g, b = table[image[i]], table[image[i + 1]], \
+                table[image[i + 2]]
+            colour = r << 16 | g << 8 | b
+            if colour != last:
+                set_pen(create_pen(r, g, b))
+                last = colour
+            pixel(x + col, py)
+            i += 3
+
+
+def stream_image(i75: I75,
+                 backend: Backend,
+                 path: str,
+                 image: bytearray,
+                 width: int = 64,
+                 height: int = 64) -> int:
+    """
+    Reads an RGB888 image of width by height pixels from path into image,
+    drawing and showing each row as soon as all of it has arrived, so the
+    drawing overlaps the download. Returns the number of bytes read.
+    """
+    row_size = width * 3
+    drawn = 0
+
+    def progress(read: int) -> None:
+        nonlocal drawn
+        rows = min(read // row_size, height)
+        if rows > drawn:
+            blit(i75, image, width=width, height=height,
+                 start_y=drawn, end_y=rows)
+            i75.display.update()
+            drawn = rows
+
+    return backend.get_into(path, image, progress, step=row_size)
@@ -17,12 +17,16 @@
 
 import math
 try:
-    from typing import Tuple
+    from typing import Any, Dict, Optional, Tuple
 except ImportError:
     pass
-import urequests
 
-from i75 import I75, ThreeColourImage, render_text, text_boundingbox
+from i75 import I75, render_text
+
+from .assets import ASSETS
+from .backend import Backend
+from .text_metrics import text_boundingbox
+from .utils import blit, render_stale_marker
 
 FONT = "cg_pixel_3x5_5"
 
@@ -30,21 +34,37 @@ LIGHT_GAP = 4
 
 
 class WaterGas:
-    def __init__(self, backend: str) -> None:
+    def __init__(self,
+                 i75: I75,
+                 backend: Backend,
+                 image: bytearray,
+                 data: Optional[Dict[str, Any]] = None) -> None:
         self.rendered = False
         self.total_time = 0
+        self.stale = False
+
+        if data is None:
+            data = WaterGas.fetch(i75, backend, image)
+        self.data = data
+
+    @staticmethod
+    def fetch(i75: I75, backend: Backend, image: bytearray) -> Dict[str, Any]:
+        return backend.get_json("/water_gas")
+
+    def time_left(self) -> int:
+        return 30000 - self.total_time
 
-        r = urequests.get(f"http://{backend}:6001/water_gas", timeout=10)
-        try:
-            self.data = r.json()
-        finally:
-            r.close()
+    def next_frame(self) -> int:
+        return self.time_left() if self.rendered else 0
+
+    def restart(self) -> None:
+        self.total_time = 0
 
     def render(self, i75: I75, frame_time: int) -> bool:
         self.total_time += frame_time
 
         if self.rendered:
-            return self.total_time > 30000
+            return self.total_time >= 30000
 
         white = i75.display.create_pen(255, 255, 255)
 
@@ -93,9 +113,14 @@ class WaterGas:
                     53,
                     f"£{self.data['gas_cost']:0.2f}")
 
-        ThreeColourImage.render_from_file(open("images/tap.i75", "rb"), i75.display, 35, 5)
+        tap = ASSETS.load("images/tap.i75")
+        blit(i75, tap.data, 35, 5, tap.width, tap.height)
+
+        flame = ASSETS.load("images/flame.i75")
+        blit(i75, flame.data, 5, 35, flame.width, flame.height)
 
-        ThreeColourImage.render_from_file(open("images/flame.i75", "rb"), i75.display, 5, 35)
+        if self.stale:
+            render_stale_marker(i75)
 
         i75.display.update()
         self.rendered = True